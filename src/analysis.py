@@ -1,32 +1,43 @@
 import yfinance as yf
 import pandas as pd
-import pandas_ta_classic as ta
 import requests
 import src.config as config
-import streamlit as st
 import numpy as np
 import math
+import sys
 
 from datetime import datetime, timedelta
 
-from src.finnhub_client import get_finnhub_client
+from src.cache import cached
+from src.compact import compact_advanced_data, compact_news, compact_option_chain, compact_price_frame, PRICE_COLUMNS
+from src.finnhub_client import call_finnhub, get_finnhub_client
+from src.fundamentals import get_basic_metrics, get_fundamentals
+from src.scheduler import QuotaExceeded, SCHEDULER
+from src.strategy import DEFAULT
+from src.volatility import bs_delta, fit_iv_smile
 
-@st.cache_data
+RISK_FREE_RATE = 0.045 # Assumption: 4.5% risk-free rate
+SENTIMENT_RATE_LIMITED = "Alpha Vantage API Error: Rate limit exceeded."
+
+@cached(ttl=1800, fallback=lambda ticker: None)
 def get_company_news(ticker):
     """
     Fetches company news from Finnhub.
+    Returns None if the quota is spent and nothing is cached, so callers can tell "unavailable" from "no news".
     """
     client = get_finnhub_client()
     today = datetime.now().strftime('%Y-%m-%d')
     yesterday = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
-    news = client.company_news(ticker, _from=yesterday, to=today)
-    return news
+    news = call_finnhub(lambda: client.company_news(ticker, _from=yesterday, to=today))
+    return compact_news(news)
 
 def calculate_news_sentiment(news_items):
     """
     Calculates a simple sentiment score from a list of news items.
-    Returns a score between -1 and 1.
+    Returns a score between -1 and 1, or None if the news is unavailable (None).
     """
+    if news_items is None:
+        return None
     if not news_items:
         return 0.0
     
@@ -55,34 +66,48 @@ def calculate_news_sentiment(news_items):
         
     return total_score / count if count > 0 else 0.0
 
-@st.cache_data
+@cached(ttl=6 * 3600, fallback=lambda ticker: None)
 def get_advanced_data(ticker):
     """
     Fetches advanced data from Finnhub: Financials, Filings, Metrics, Recommendations, Lobbying, Spending.
-    Returns a dictionary with keys corresponding to the data points.
+    Returns a dictionary with keys corresponding to the data points, trimmed to the fields the app uses,
+    or None if the quota is spent and nothing is cached.
     """
     client = get_finnhub_client()
     data = {}
     
-    # Helper to safely call API
+    # Helper to safely call API. Running out of quota aborts the whole fetch
+    # so that the previously cached data is served instead of a partial result.
     def safe_api_call(call_lambda):
         try:
-            return call_lambda()
+            return call_finnhub(call_lambda)
+        except QuotaExceeded:
+            raise
         except Exception as e:
-            print(f"Finnhub API error for {ticker}: {e}")
+            print(f"Finnhub API error for {ticker}: {e}", file=sys.stderr)
             return None
 
     # Dates for lobbying/spending (last 1 year)
     today = datetime.now().strftime('%Y-%m-%d')
     last_year = (datetime.now() - timedelta(days=365)).strftime('%Y-%m-%d')
 
-    data['financials'] = safe_api_call(lambda: client.financials_reported(symbol=ticker, freq='quarterly'))
-    data['filings'] = safe_api_call(lambda: client.filings(symbol=ticker))
-    data['metrics'] = safe_api_call(lambda: client.company_basic_financials(ticker, 'all'))
+    # Financials and filings only change with a new report, so they come from the fundamentals store
+    fundamentals = get_fundamentals(ticker)
+    try:
+        metrics = get_basic_metrics(ticker)
+    except QuotaExceeded:
+        raise
+    except Exception as e:
+        print(f"Finnhub API error for {ticker}: {e}", file=sys.stderr)
+        metrics = None
     data['recommendations'] = safe_api_call(lambda: client.recommendation_trends(ticker))
     data['lobbying'] = safe_api_call(lambda: client.stock_lobbying(ticker, _from=last_year, to=today))
     data['usa_spending'] = safe_api_call(lambda: client.stock_usa_spending(ticker, _from=last_year, to=today))
     
+    data = compact_advanced_data(data)
+    data['metrics'] = metrics
+    if fundamentals is not None:
+        data.update({key: fundamentals[key] for key in ('financials', 'filings')})
     return data
 
 def calculate_analyst_sentiment(recommendations):
@@ -113,62 +138,51 @@ def calculate_analyst_sentiment(recommendations):
     score = (strong_buy * 1.0 + buy * 0.5 + hold * 0.0 + sell * -0.5 + strong_sell * -1.0) / total
     return score
 
-@st.cache_data
-def get_stock_data(ticker):
+@cached(ttl=900)
+def get_price_history(ticker, period="1y"):
     """
-    Fetches historical stock data and calculates technical indicators.
+    Fetches daily OHLCV bars from yfinance in compact form (float32 prices, integer volume).
+    Returns None if no data is available.
     """
-    # Fetch daily data for the last year
-    data = yf.download(ticker, period="1y", interval="1d")
-    data.columns = data.columns.get_level_values(0)
+    data = yf.download(ticker, period=period, interval="1d")
     if data.empty:
-        print(f"No data found for {ticker}, please check the ticker symbol.")
         return None
 
-    # Calculate technical indicators
-    # RSI
-    data.ta.rsi(append=True)
-    # Simple Moving Averages (50 and 200 days)
-    data.ta.sma(length=50, append=True)
-    data.ta.sma(length=200, append=True)
+    # Handle MultiIndex columns if present
+    if isinstance(data.columns, pd.MultiIndex):
+        data.columns = data.columns.get_level_values(0)
 
-    return data
+    return compact_price_frame(data[[column for column in PRICE_COLUMNS if column in data.columns]])
 
-def generate_suggestion(data, sentiment=None, news_sentiment=None, analyst_sentiment=None):
+def get_stock_data(ticker, strategy=DEFAULT):
     """
-    Generates a 'call', 'put', or 'hold' suggestion based on technical indicators and sentiment.
-    If sentiment, news_sentiment, or analyst_sentiment is provided, it incorporates them into the decision.
+    Fetches historical stock data and calculates the strategy's technical indicators.
     """
-    latest_data = data.iloc[-1]
+    # Fetch daily data for the last year
+    data = get_price_history(ticker, "1y")
+    if data is None:
+        print(f"No data found for {ticker}, please check the ticker symbol.", file=sys.stderr)
+        return None
 
-    # Bullish Signal
-    is_bullish = latest_data['SMA_50'] > latest_data['SMA_200'] and latest_data['RSI_14'] < 70 and latest_data['Close'] > latest_data['SMA_50']
-    
-    # Bearish Signal
-    is_bearish = latest_data['SMA_50'] < latest_data['SMA_200'] and latest_data['RSI_14'] > 30 and latest_data['Close'] < latest_data['SMA_50']
+    # Calculate technical indicators (RSI, SMA 50/200 for the default strategy)
+    return compact_price_frame(strategy.add_indicators(data))
 
+def generate_suggestion(data, sentiment=None, news_sentiment=None, analyst_sentiment=None, strategy=DEFAULT):
+    """
+    Generates a 'call', 'put', or 'hold' suggestion based on technical indicators and sentiment.
+    If sentiment, news_sentiment, or analyst_sentiment is provided, it incorporates them into the decision.
+    """
     # Determine effective sentiment (average of available sources)
     sources = [s for s in [sentiment, news_sentiment, analyst_sentiment] if s is not None]
     if sources:
         effective_sentiment = sum(sources) / len(sources)
     else:
-        effective_sentiment = None
+        effective_sentiment = None # Sentiment-agnostic logic
 
-    if effective_sentiment is not None:
-        if is_bullish and effective_sentiment > 0.15:
-            return "Call"
-        if is_bearish and effective_sentiment < -0.15:
-            return "Put"
-    else: # Sentiment-agnostic logic
-        if is_bullish:
-            return "Call"
-        if is_bearish:
-            return "Put"
+    return strategy.evaluate(data, effective_sentiment, latest_only=True).iloc[-1]
 
-    return "Hold"
 
-
-@st.cache_data
+@cached(ttl=3600, fallback=lambda ticker: (0.0, SENTIMENT_RATE_LIMITED))
 def get_sentiment(ticker):
     """
     Fetches sentiment data for a given ticker from Alpha Vantage.
@@ -176,7 +190,7 @@ def get_sentiment(ticker):
     """
     url = f"https://www.alphavantage.co/query?function=NEWS_SENTIMENT&tickers={ticker}&apikey={config.ALPHA_VANTAGE_API_KEY}"
     try:
-        r = requests.get(url)
+        r = SCHEDULER.call('alphavantage', lambda: requests.get(url))
         r.raise_for_status()  # Raise an exception for bad status codes (4xx or 5xx)
         data = r.json()
 
@@ -184,7 +198,8 @@ def get_sentiment(ticker):
         if "Information" in data:
             info_message = data['Information']
             if "rate limit" in info_message.lower():
-                return 0.0, "Alpha Vantage API Error: Rate limit exceeded."
+                SCHEDULER.exhaust('alphavantage')
+                raise QuotaExceeded("alphavantage API rate limit reached")
             else:
                 return 0.0, "Alpha Vantage API Error: Please check your API key and try again."
         if "Error Message" in data:
@@ -209,13 +224,42 @@ def get_sentiment(ticker):
     return 0.0, "Failed to fetch sentiment data for an unknown reason."
 
 
-@st.cache_data
-def get_option_chain(ticker):
+@cached(ttl=3600)
+def get_option_expirations(ticker):
+    """
+    Fetches the available option expiration dates for a given ticker.
+    """
+    return tuple(yf.Ticker(ticker).options)
+
+@cached(ttl=900)
+def get_option_chain(ticker, expiration):
     """
-    Fetches the option chain for a given ticker.
+    Fetches the option chain for a given ticker and expiration date.
+    Returns a (calls, puts) tuple of compact DataFrames.
     """
-    stock = yf.Ticker(ticker)
-    return stock.option_chain
+    chain = yf.Ticker(ticker).option_chain(expiration)
+    return compact_option_chain(chain.calls), compact_option_chain(chain.puts)
+
+def years_to_expiration(expiration):
+    """
+    Returns the time to an expiration date ('%Y-%m-%d') in years.
+    """
+    exp_date = datetime.strptime(expiration, '%Y-%m-%d')
+    return (exp_date - datetime.now()).days / 365.0
+
+@cached(ttl=900)
+def get_iv_surface(ticker, expiration, underlying_price):
+    """
+    Fits an implied volatility smile for one expiration from the option chain's bid/ask mids,
+    at the given underlying price (pass the same price used for delta so both agree).
+    Returns a DataFrame indexed by strike with an 'iv' column, or None if it cannot be fitted.
+    """
+    T = years_to_expiration(expiration)
+    if T <= 0:
+        return None
+    calls, puts = get_option_chain(ticker, expiration)
+    surface = fit_iv_smile(calls, puts, underlying_price, T, RISK_FREE_RATE)
+    return surface if not surface.empty else None
 
 def calculate_delta(S, K, T, r, sigma, option_type):
     """
@@ -235,27 +279,33 @@ def calculate_delta(S, K, T, r, sigma, option_type):
         return cdf - 1
     return 0.0
 
-@st.cache_data
+@cached(ttl=60)
+def get_latest_price(ticker):
+    """
+    Fetches the latest closing price for a given ticker, or None if unavailable.
+    """
+    history = yf.Ticker(ticker).history(period="1d")
+    if history.empty:
+        return None
+    return float(history['Close'].iloc[-1])
+
+@cached(ttl=900)
 def find_options_contracts(ticker, suggestion, max_cost=20, underlying_price=None):
     """
     Finds a suitable options contract based on the suggestion and risk management rules.
     Prioritizes liquidity (Open Interest) and proximity to current price (Delta proxy).
     Returns the contract and its expiration date.
     """
-    stock = yf.Ticker(ticker)
-
     # Get underlying price if not provided
     if underlying_price is None:
         try:
-            history = stock.history(period="1d")
-            if not history.empty:
-                underlying_price = history['Close'].iloc[-1]
-            else:
-                return None, None
+            underlying_price = get_latest_price(ticker)
         except Exception:
             return None, None
+        if underlying_price is None:
+            return None, None
 
-    expirations = stock.options
+    expirations = get_option_expirations(ticker)
     if not expirations:
         return None, None
 
@@ -284,27 +334,36 @@ def find_options_contracts(ticker, suggestion, max_cost=20, underlying_price=Non
         return None, None
 
     if suggestion == "Call":
-        options = stock.option_chain(target_expiration).calls
+        options = get_option_chain(ticker, target_expiration)[0]
     elif suggestion == "Put":
-        options = stock.option_chain(target_expiration).puts
+        options = get_option_chain(ticker, target_expiration)[1]
     else:
         return None, None
 
+    # Premium actually paid: bid/ask mid where quoted, last trade otherwise
+    quoted = (options['bid'] > 0) & (options['ask'] >= options['bid'])
+    premium = pd.Series(np.where(quoted, (options['bid'] + options['ask']) / 2, options['lastPrice']), index=options.index)
+
     # Filter: Out of the Money AND Within Budget
-    candidates = options[(options['inTheMoney'] == False) & (options['lastPrice'] * 100 <= max_cost)].copy()
+    candidates = options[(options['inTheMoney'] == False) & (premium * 100 <= max_cost)].copy()
+    candidates['premium'] = premium
 
     if candidates.empty:
         return None, None
 
-    # Calculate Delta for filtering
-    exp_date = datetime.strptime(target_expiration, '%Y-%m-%d')
-    T = (exp_date - datetime.now()).days / 365.0
-    r = 0.045 # Assumption: 4.5% risk-free rate
-
-    def get_delta(row):
-        return calculate_delta(underlying_price, row['strike'], T, r, row['impliedVolatility'], suggestion)
+    # Replace yfinance's implied volatility (often stale or zero for illiquid strikes)
+    # with the fitted smile, so delta, PoP and breakeven all use the same volatility
+    # Rounded to cents so the fitted smile is cached per quoted price
+    underlying_price = round(float(underlying_price), 2)
+    surface = get_iv_surface(ticker, target_expiration, underlying_price)
+    if surface is not None:
+        fitted = surface['iv'].reindex(candidates['strike'].astype(float)).to_numpy()
+        candidates['impliedVolatility'] = np.where(np.isnan(fitted), candidates['impliedVolatility'], fitted)
 
-    candidates['delta'] = candidates.apply(get_delta, axis=1)
+    # Calculate Delta for filtering
+    T = years_to_expiration(target_expiration)
+    candidates['delta'] = bs_delta(underlying_price, candidates['strike'].to_numpy(), T, RISK_FREE_RATE,
+                                   candidates['impliedVolatility'].to_numpy(), suggestion == "Call")
 
     # Filter out low probability trades (e.g. < 15%) to avoid "lottery tickets"
     candidates = candidates[candidates['delta'].abs() >= 0.15]
@@ -347,9 +406,9 @@ def find_options_contracts(ticker, suggestion, max_cost=20, underlying_price=Non
         reasoning = f"High Liquidity (OI: {row['openInterest']}). {risk} play ({dist:.1%} OTM)."
         
         if suggestion == "Call":
-            breakeven = row['strike'] + row['lastPrice']
+            breakeven = row['strike'] + row['premium']
         else:
-            breakeven = row['strike'] - row['lastPrice']
+            breakeven = row['strike'] - row['premium']
 
         # Calculate Delta / PoP
         delta = row['delta']
@@ -361,24 +420,21 @@ def find_options_contracts(ticker, suggestion, max_cost=20, underlying_price=Non
 
     return top_contracts, target_expiration
 
-def run_backtest(ticker, period="1y", initial_capital=10000):
+def run_backtest(ticker, period="1y", initial_capital=10000, sentiment=None, strategy=DEFAULT):
     """
     Runs a backtest of the technical strategy on historical data.
+    If sentiment is given (a daily DataFrame of sentiment scores, e.g. from SentimentStore.daily_series),
+    signals are gated on it the same way generate_suggestion gates live signals.
     """
     # Fetch data
-    data = yf.download(ticker, period=period, interval="1d")
-    if data.empty:
+    data = get_price_history(ticker, period)
+    if data is None:
         return None, "No data found"
-    
-    # Handle MultiIndex columns if present
-    if isinstance(data.columns, pd.MultiIndex):
-        data.columns = data.columns.get_level_values(0)
+    # Simulate in float64 so balances don't accumulate float32 rounding
+    data = data.astype('float64')
         
     # Calculate Indicators
-    data.ta.rsi(append=True)
-    data.ta.sma(length=50, append=True)
-    data.ta.sma(length=200, append=True)
-    data = data.dropna()
+    data = strategy.add_indicators(data).dropna()
     
     if data.empty:
         return None, "Not enough data for indicators"
@@ -392,11 +448,14 @@ def run_backtest(ticker, period="1y", initial_capital=10000):
     trades = []
     equity_curve = []
     
-    for index, row in data.iterrows():
-        # Strategy Logic (Same as generate_suggestion but purely technical)
-        is_bullish = row['SMA_50'] > row['SMA_200'] and row['RSI_14'] < 70 and row['Close'] > row['SMA_50']
-        is_bearish = row['SMA_50'] < row['SMA_200'] and row['RSI_14'] > 30 and row['Close'] < row['SMA_50']
-        
+    # Strategy Logic (Same as generate_suggestion, evaluated for all bars at once)
+    effective_sentiment = None
+    if sentiment is not None:
+        # Align daily scores onto the bars; sources without data for a day are left out of the average
+        effective_sentiment = sentiment.reindex(data.index.normalize()).mean(axis=1).to_numpy()
+    signals = strategy.signal_masks(data, effective_sentiment)
+
+    for (index, row), is_bullish, is_bearish in zip(data.iterrows(), signals['Call'], signals['Put']):
         # Exit Logic
         if position == 1 and not is_bullish: # Exit Long
             balance += shares * row['Close']
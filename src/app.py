@@ -1,6 +1,9 @@
 import streamlit as st
-from datetime import datetime
+from datetime import date, datetime, timedelta
 from src.analysis import get_stock_data, generate_suggestion, get_sentiment, find_options_contracts, get_company_news, calculate_news_sentiment, get_advanced_data, calculate_analyst_sentiment, run_backtest
+from src.cache import get_cache_stats
+from src.sentiment_store import MAX_NEWS_HISTORY_DAYS, SentimentStore
+from src.watchlist import add_to_watchlist, load_watchlist
 
 st.set_page_config(page_title="Stock Market Agent", layout="wide")
 st.title("📈 Stock Market Agent")
@@ -25,6 +28,9 @@ with st.sidebar:
         max_option_cost = st.number_input("Max Option Cost ($)", min_value=1, value=2000, step=5)
         st.button("Analyze Stock", type="primary", on_click=set_selected_ticker, args=(new_ticker,))
 
+    with st.expander("Cache Statistics"):
+        st.json(get_cache_stats())
+
 if page == "Live Analysis":
     # --- Main Layout ---
     col1, col2 = st.columns([1, 3]) # Left column for watchlist, Right for analysis
@@ -37,12 +43,10 @@ if page == "Live Analysis":
         new_wl_ticker = st.text_input("Add Ticker", placeholder="MSFT").upper()
         if st.button("Add"):
             if new_wl_ticker:
-                with open("watchlist.txt", "a") as f:
-                    f.write(f"\n{new_wl_ticker}")
+                add_to_watchlist(new_wl_ticker)
                 st.rerun()
 
-        with open("watchlist.txt") as f:
-            watchlist = [line.strip() for line in f if line.strip()]
+        watchlist = load_watchlist()
 
         if watchlist:
             with st.container(height=600):
@@ -76,6 +80,9 @@ if page == "Live Analysis":
 
                     # Get Advanced Data (Financials, Recommendations, etc.)
                     adv_data = get_advanced_data(ticker)
+                    if adv_data is None:
+                        st.warning("Finnhub quota exhausted: analyst and fundamental data are temporarily unavailable.")
+                        adv_data = {}
                     analyst_score = calculate_analyst_sentiment(adv_data.get('recommendations'))
                     
                     # Generate Suggestion with all sentiment sources
@@ -86,7 +93,7 @@ if page == "Live Analysis":
                     m_col1.metric("Suggestion", suggestion, delta=None if suggestion == "Hold" else suggestion)
                     m_col2.metric("Current Price", f"${stock_data['Close'].iloc[-1]:.2f}")
                     
-                    combined_display = f"AV: {sentiment_display} | News: {news_score:.2f} | Analyst: {f'{analyst_score:.2f}' if analyst_score is not None else 'N/A'}"
+                    combined_display = f"AV: {sentiment_display} | News: {f'{news_score:.2f}' if news_score is not None else 'N/A'} | Analyst: {f'{analyst_score:.2f}' if analyst_score is not None else 'N/A'}"
                     m_col3.metric("Sentiment Scores", combined_display)
 
                     # Chart
@@ -99,7 +106,7 @@ if page == "Live Analysis":
                         contracts, expiration = find_options_contracts(ticker, suggestion, max_cost=max_option_cost, underlying_price=stock_data['Close'].iloc[-1])
                         
                         if contracts is not None and not contracts.empty:
-                            st.dataframe(contracts[['contractSymbol', 'strike', 'lastPrice', 'Breakeven', 'PoP', 'Risk Level', 'Reasoning', 'volume', 'openInterest', 'impliedVolatility']].astype(str), hide_index=True)
+                            st.dataframe(contracts[['contractSymbol', 'strike', 'premium', 'lastPrice', 'Breakeven', 'PoP', 'Risk Level', 'Reasoning', 'volume', 'openInterest', 'impliedVolatility']].astype(str), hide_index=True)
                             st.caption(f"Expiration: {expiration}")
                         else:
                             st.warning(f"No suitable {suggestion} contract found under ${max_option_cost}.")
@@ -160,6 +167,8 @@ if page == "Live Analysis":
                             st.markdown(f"**[{item['headline']}]({item['url']})**")
                             st.caption(f"{datetime.fromtimestamp(item['datetime']).strftime('%Y-%m-%d %H:%M')} - {item['source']}")
                             st.write(item['summary'])
+                    elif news is None:
+                        st.warning("Finnhub quota exhausted: company news is temporarily unavailable.")
                     else:
                         st.info("No recent news found.")
                 else:
@@ -177,10 +186,23 @@ elif page == "Backtesting":
         bt_period = st.selectbox("Period", ["1y", "2y", "5y", "10y"], index=1)
     with col_b2:
         initial_capital = st.number_input("Initial Capital", value=10000, step=1000)
+        use_sentiment = st.checkbox("Gate signals on news & analyst sentiment", help="Backfills up to one year of Finnhub news history, a batch per run within the Finnhub budget.")
         
     if st.button("Run Backtest"):
         with st.spinner(f"Backtesting {bt_ticker} over {bt_period}..."):
-            trades, equity = run_backtest(bt_ticker, bt_period, initial_capital)
+            sentiment = None
+            if use_sentiment:
+                end = date.today()
+                start = end - timedelta(days=365 * int(bt_period[:-1]))
+                store = SentimentStore()
+                store.backfill(bt_ticker, start, end)
+                sentiment = store.daily_series(bt_ticker, start, end)
+                # Today is refetched every run, so only earlier days count towards coverage
+                recent = sentiment['news_sentiment'].iloc[-MAX_NEWS_HISTORY_DAYS:-1]
+                if recent.isna().any():
+                    st.info(f"News sentiment covers {recent.notna().sum()} of the last {len(recent)} days so far; the rest is "
+                            "backfilled on later runs as the Finnhub budget allows. Days without it are gated on analyst sentiment only.")
+            trades, equity = run_backtest(bt_ticker, bt_period, initial_capital, sentiment=sentiment)
             
             if trades is not None and not trades.empty:
                 # Summary Metrics
@@ -0,0 +1,399 @@
+import json
+import sqlite3
+import struct
+import sys
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from contextlib import closing
+from functools import wraps
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+import src.config as config
+from src.scheduler import QuotaExceeded, SCHEDULER
+from src.singleflight import SingleFlight
+
+MISSING = object()
+
+
+def estimate_nbytes(value):
+    """
+    Estimates the in-memory size of a cached value in bytes.
+    DataFrames are measured with deep memory usage; containers are summed recursively.
+    """
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, (pd.Series, pd.Index)):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_nbytes(k) + estimate_nbytes(v) for k, v in value.items())
+    if isinstance(value, (list, tuple, set)):
+        return sys.getsizeof(value) + sum(estimate_nbytes(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class MemoryCache:
+    """
+    Thread-safe LRU cache bounded by the total estimated size of its values.
+    Expired entries stay in the cache as stale copies until evicted or replaced.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # key -> (value, nbytes, expires_at)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Returns the cached value for key, or MISSING if absent or expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return MISSING
+            value, _, expires_at = entry
+            if expires_at is not None and expires_at <= time.time():
+                self.misses += 1
+                return MISSING
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def peek(self, key):
+        """
+        Like get(), but without updating hit/miss counters or recency.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (entry[2] is not None and entry[2] <= time.time()):
+                return MISSING
+            return entry[0]
+
+    def get_stale(self, key):
+        """
+        Returns the cached value for key even if it has expired, or MISSING if absent.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            return MISSING if entry is None else entry[0]
+
+    def set(self, key, value, ttl=None):
+        """
+        Stores value under key, evicting least recently used entries to stay within max_bytes.
+        Values larger than the whole budget are not cached.
+        """
+        nbytes = estimate_nbytes(value)
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if nbytes > self.max_bytes:
+                return
+            self._entries[key] = (value, nbytes, expires_at)
+            self.nbytes += nbytes
+            while self.nbytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    def stats(self):
+        """
+        Returns a dict with entry count, bytes used and hit/miss/eviction counters.
+        """
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self.nbytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+    def _remove(self, key):
+        _, nbytes, _ = self._entries.pop(key)
+        self.nbytes -= nbytes
+
+
+class CacheBackend:
+    """
+    Base class for shared cache backends. Backends store opaque serialized payloads
+    so that several replicas can reuse each other's fetched data.
+    """
+
+    def get(self, key):
+        """Returns the payload bytes stored under key, or None."""
+        raise NotImplementedError
+
+    def set(self, key, payload, ttl=None):
+        """Stores payload bytes under key, expiring after ttl seconds if given."""
+        raise NotImplementedError
+
+
+class SQLiteBackend(CacheBackend):
+    """
+    Shared cache stored in a local SQLite file. Used for tests and single-host setups.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with closing(self._connect()) as conn, conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, payload BLOB, expires_at REAL)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def get(self, key):
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT payload FROM cache WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+                (key, time.time()),
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key, payload, ttl=None):
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, payload, expires_at) VALUES (?, ?, ?)",
+                (key, sqlite3.Binary(payload), now + ttl if ttl else None),
+            )
+
+
+class RedisBackend(CacheBackend):
+    """
+    Shared cache stored in Redis (or any Redis-compatible key-value store).
+    """
+
+    def __init__(self, url, prefix="stock-agent:"):
+        import redis  # Only needed when a Redis backend is configured
+
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key):
+        return self.client.get(self.prefix + key)
+
+    def set(self, key, payload, ttl=None):
+        self.client.set(self.prefix + key, payload, ex=max(1, int(ttl)) if ttl else None)
+
+
+def create_backend(url):
+    """
+    Creates a shared cache backend from a URL: 'redis://...', 'rediss://...' or 'sqlite:///path'.
+    Returns None for an empty URL (process-local caching only).
+    """
+    if not url:
+        return None
+    if url.startswith(('redis://', 'rediss://')):
+        return RedisBackend(url)
+    if url.startswith('sqlite:///'):
+        return SQLiteBackend(url[len('sqlite:///'):])
+    raise ValueError(f"Unsupported cache backend: {url}")
+
+
+# Payloads are an 8-byte expiry timestamp (0 = never) followed by a zlib-compressed body:
+# a length-prefixed JSON document, then one length-prefixed Arrow IPC stream per DataFrame.
+# Nothing in a payload is executable, so a compromised backend cannot run code in the app.
+_HEADER = struct.Struct('>d')
+_LENGTH = struct.Struct('>I')
+
+
+def _encode(value, frames):
+    """
+    Converts a value to JSON-compatible data, moving DataFrames into frames.
+    """
+    if isinstance(value, pd.DataFrame):
+        frames.append(value)
+        return {'__frame__': len(frames) - 1}
+    if isinstance(value, tuple):
+        return {'__tuple__': [_encode(item, frames) for item in value]}
+    if isinstance(value, list):
+        return [_encode(item, frames) for item in value]
+    if isinstance(value, dict):
+        if not all(isinstance(key, str) for key in value) or '__frame__' in value or '__tuple__' in value:
+            raise TypeError("Only dicts with plain string keys can be cached in the shared backend")
+        return {key: _encode(item, frames) for key, item in value.items()}
+    if isinstance(value, np.generic):
+        return value.item()
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    raise TypeError(f"Cannot cache {type(value).__name__} in the shared backend")
+
+
+def _decode(value, frames):
+    if isinstance(value, list):
+        return [_decode(item, frames) for item in value]
+    if isinstance(value, dict):
+        if '__frame__' in value:
+            return frames[value['__frame__']]
+        if '__tuple__' in value:
+            return tuple(_decode(item, frames) for item in value['__tuple__'])
+        return {key: _decode(item, frames) for key, item in value.items()}
+    return value
+
+
+def _frame_to_arrow(frame):
+    table = pa.Table.from_pandas(frame)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def _frame_from_arrow(data):
+    return pa.ipc.open_stream(data).read_all().to_pandas()
+
+
+def serialize(value, expires_at=None):
+    """
+    Serializes a cached value and its expiry time into compact bytes.
+    Supports DataFrames, dicts with string keys, lists, tuples and JSON scalars.
+    """
+    frames = []
+    document = json.dumps(_encode(value, frames)).encode()
+    parts = [_LENGTH.pack(len(document)), document]
+    for frame in frames:
+        data = _frame_to_arrow(frame)
+        parts += [_LENGTH.pack(len(data)), data]
+    return _HEADER.pack(expires_at or 0.0) + zlib.compress(b''.join(parts))
+
+
+def deserialize(payload):
+    """
+    Returns (value, expires_at) from bytes produced by serialize().
+    """
+    (expires_at,) = _HEADER.unpack_from(payload)
+    body = zlib.decompress(payload[_HEADER.size:])
+
+    chunks = []
+    offset = 0
+    while offset < len(body):
+        (length,) = _LENGTH.unpack_from(body, offset)
+        offset += _LENGTH.size
+        chunks.append(body[offset:offset + length])
+        offset += length
+
+    frames = [_frame_from_arrow(chunk) for chunk in chunks[1:]]
+    return _decode(json.loads(chunks[0]), frames), expires_at or None
+
+
+CACHE = MemoryCache(config.CACHE_MAX_BYTES)
+BACKEND = create_backend(config.CACHE_BACKEND)
+FLIGHTS = SingleFlight()
+
+
+def get_cache_stats():
+    """
+    Returns memory cache usage, request coalescing counters and provider quota usage.
+    """
+    return {'memory': CACHE.stats(), 'fetches': FLIGHTS.stats(), 'quotas': SCHEDULER.stats()}
+
+
+def _backend_get(key):
+    """
+    Reads a value from the shared backend, returning (value, remaining_ttl) or (MISSING, None).
+    Backend errors are logged and treated as misses so the app keeps working without it.
+    """
+    if BACKEND is None:
+        return MISSING, None
+    try:
+        payload = BACKEND.get(key)
+        if payload is None:
+            return MISSING, None
+        value, expires_at = deserialize(payload)
+    except Exception as e:
+        print(f"Shared cache read error for {key}: {e}", file=sys.stderr)
+        return MISSING, None
+
+    if expires_at is None:
+        return value, None
+    remaining = expires_at - time.time()
+    if remaining <= 0:
+        return MISSING, None
+    return value, remaining
+
+
+def _backend_set(key, value, ttl):
+    if BACKEND is None:
+        return
+    try:
+        BACKEND.set(key, serialize(value, time.time() + ttl if ttl else None), ttl)
+    except Exception as e:
+        print(f"Shared cache write error for {key}: {e}", file=sys.stderr)
+
+
+def make_key(prefix, args, kwargs):
+    """
+    Builds a stable string cache key from a function name and its arguments.
+    """
+    parts = [repr(arg) for arg in args] + [f"{name}={value!r}" for name, value in sorted(kwargs.items())]
+    return f"{prefix}({', '.join(parts)})"
+
+
+def cached(ttl=None, fallback=None):
+    """
+    Caches a function's return value in the process-wide byte-bounded cache,
+    backed by the shared cache backend (if configured) so other replicas can reuse it.
+    Concurrent misses for the same arguments are coalesced into a single call.
+    Cached values are shared between callers and must not be mutated.
+
+    If the function raises QuotaExceeded, the last (stale) cached value is served instead.
+    Without one, fallback(*args, **kwargs) is returned uncached, or the error re-raised.
+    """
+    def decorator(func):
+        prefix = f"{func.__module__}.{func.__qualname__}"
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            key = make_key(prefix, args, kwargs)
+            value = CACHE.get(key)
+            if value is not MISSING:
+                return value
+
+            def load():
+                # Another caller may have finished loading since the check above
+                value = CACHE.peek(key)
+                if value is not MISSING:
+                    return value
+
+                value, remaining = _backend_get(key)
+                if value is not MISSING:
+                    CACHE.set(key, value, remaining)
+                    return value
+
+                try:
+                    value = func(*args, **kwargs)
+                except QuotaExceeded as e:
+                    value = CACHE.get_stale(key)
+                    if value is not MISSING:
+                        print(f"{e}; serving stale data for {key}", file=sys.stderr)
+                        return value
+                    if fallback is None:
+                        raise
+                    print(f"{e}; no cached data for {key}", file=sys.stderr)
+                    return fallback(*args, **kwargs)
+
+                CACHE.set(key, value, ttl)
+                _backend_set(key, value, ttl)
+                return value
+
+            return FLIGHTS.do(key, load)
+
+        return wrapper
+    return decorator
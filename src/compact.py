@@ -0,0 +1,117 @@
+import pandas as pd
+
+# Columns kept from provider payloads. Anything else is dropped before caching.
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+OPTION_COLUMNS = ['contractSymbol', 'strike', 'lastPrice', 'bid', 'ask', 'volume', 'openInterest', 'impliedVolatility', 'inTheMoney']
+NEWS_FIELDS = ['id', 'datetime', 'headline', 'summary', 'url', 'source']
+METRIC_FIELDS = ['peTTM', 'epsTTM', '52WeekHigh', '52WeekLow']
+RECOMMENDATION_FIELDS = ['period', 'strongBuy', 'buy', 'hold', 'sell', 'strongSell']
+FILING_FIELDS = ['form', 'filingUrl', 'filedDate']
+LOBBYING_FIELDS = ['name', 'description']
+SPENDING_FIELDS = ['agencyName', 'amount']
+
+# XBRL concepts kept from financials_reported, mapped to short names.
+FINANCIAL_CONCEPTS = {
+    'Revenues': 'revenue',
+    'RevenueFromContractWithCustomerExcludingAssessedTax': 'revenue',
+    'NetIncomeLoss': 'net_income',
+    'EarningsPerShareDiluted': 'eps_diluted',
+    'Assets': 'total_assets',
+    'Liabilities': 'total_liabilities',
+    'StockholdersEquity': 'equity',
+}
+
+
+def _downcast_count(series):
+    """
+    Converts a count column (volume, open interest) to the smallest unsigned integer type.
+    """
+    return pd.to_numeric(series.fillna(0).astype('int64'), downcast='unsigned')
+
+
+def pick_fields(item, fields):
+    """
+    Returns a copy of a dict with only the given keys.
+    """
+    return {field: item.get(field) for field in fields if field in item}
+
+
+def compact_price_frame(data):
+    """
+    Downcasts an OHLCV frame: float32 prices and indicators, smallest integer type for volume.
+    """
+    data = data.copy()
+    for column in data.columns:
+        if column == 'Volume':
+            data[column] = _downcast_count(data[column])
+        elif pd.api.types.is_float_dtype(data[column]):
+            data[column] = data[column].astype('float32')
+    return data
+
+
+def compact_option_chain(options):
+    """
+    Keeps only the option chain columns used by contract selection and the UI,
+    with float32 prices, integer volume/open interest and categorical contract symbols.
+    """
+    chain = options[[column for column in OPTION_COLUMNS if column in options.columns]].copy()
+    for column in ('strike', 'lastPrice', 'bid', 'ask', 'impliedVolatility'):
+        if column in chain:
+            chain[column] = chain[column].astype('float32')
+    for column in ('volume', 'openInterest'):
+        if column in chain:
+            chain[column] = _downcast_count(chain[column])
+    if 'contractSymbol' in chain:
+        chain['contractSymbol'] = chain['contractSymbol'].astype('category')
+    if 'inTheMoney' in chain:
+        chain['inTheMoney'] = chain['inTheMoney'].astype(bool)
+    return chain.reset_index(drop=True)
+
+
+def compact_news(news_items):
+    """
+    Keeps only the news fields used for display and sentiment scoring.
+    """
+    if not news_items:
+        return []
+    return [pick_fields(item, NEWS_FIELDS) for item in news_items]
+
+
+def normalize_financials(financials, limit=4):
+    """
+    Reduces a Finnhub financials_reported payload to a few headline figures per report.
+    Returns a list of dicts, newest report first.
+    """
+    if not financials or not financials.get('data'):
+        return []
+
+    reports = []
+    for filing in financials['data'][:limit]:
+        row = pick_fields(filing, ['year', 'quarter', 'form', 'filedDate'])
+        for statement in (filing.get('report') or {}).values():
+            for line in statement or []:
+                # Concepts are namespaced, e.g. 'us-gaap_NetIncomeLoss'
+                concept = line.get('concept', '').replace(':', '_').split('_')[-1]
+                name = FINANCIAL_CONCEPTS.get(concept)
+                if name and name not in row:
+                    row[name] = line.get('value')
+        reports.append(row)
+    return reports
+
+
+def compact_advanced_data(data):
+    """
+    Trims the raw Finnhub payloads returned by get_advanced_data to what the UI and strategy read.
+    """
+    metrics = (data.get('metrics') or {}).get('metric') or {}
+    lobbying = (data.get('lobbying') or {}).get('data') or []
+    spending = (data.get('usa_spending') or {}).get('data') or []
+
+    return {
+        'financials': normalize_financials(data.get('financials')),
+        'filings': [pick_fields(f, FILING_FIELDS) for f in (data.get('filings') or [])[:5]],
+        'metrics': {'metric': pick_fields(metrics, METRIC_FIELDS)} if metrics else None,
+        'recommendations': [pick_fields(r, RECOMMENDATION_FIELDS) for r in (data.get('recommendations') or [])],
+        'lobbying': {'data': [pick_fields(item, LOBBYING_FIELDS) for item in lobbying[:3]]},
+        'usa_spending': {'data': [pick_fields(item, SPENDING_FIELDS) for item in spending[:3]]},
+    }
@@ -4,4 +4,21 @@ from dotenv import load_dotenv
 load_dotenv()
 
 ALPHA_VANTAGE_API_KEY = os.getenv("ALPHA_VANTAGE_API_KEY")
-FINNHUB_API_KEY = os.getenv("FINNHUB_API_KEY")
\ No newline at end of file
+FINNHUB_API_KEY = os.getenv("FINNHUB_API_KEY")
+
+# Upper bound on the memory used by cached provider data (bytes).
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", 64 * 1024 * 1024))
+
+
+# Shared cache used across replicas: 'redis://host:6379/0', 'sqlite:///path/to/cache.db', or empty for none.
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "")
+
+# Provider call budgets enforced by the scheduler (per replica).
+FINNHUB_CALLS_PER_MINUTE = int(os.getenv("FINNHUB_CALLS_PER_MINUTE", 60))
+ALPHA_VANTAGE_CALLS_PER_DAY = int(os.getenv("ALPHA_VANTAGE_CALLS_PER_DAY", 25))
+
+# Local store of historical news and analyst sentiment used by sentiment-aware backtests.
+SENTIMENT_DB_PATH = os.getenv("SENTIMENT_DB_PATH", "sentiment.db")
+
+# Local store of normalized fundamentals, used when no shared CACHE_BACKEND is configured.
+FUNDAMENTALS_DB_PATH = os.getenv("FUNDAMENTALS_DB_PATH", "fundamentals.db")
@@ -0,0 +1,174 @@
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+import requests
+
+from src.analysis import get_stock_data, generate_suggestion, get_sentiment, get_company_news, calculate_news_sentiment, get_advanced_data, calculate_analyst_sentiment, find_options_contracts, SENTIMENT_RATE_LIMITED
+from src.cache import get_cache_stats
+from src.scheduler import BACKGROUND, request_priority
+from src.watchlist import load_watchlist
+
+
+class JsonlSink:
+    """
+    Writes events as JSON lines to a file, or to stdout if no path is given.
+    Also serves as a local stand-in for the webhook sink.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+
+    def emit(self, event):
+        line = json.dumps(event)
+        if self.path is None:
+            print(line, flush=True)
+        else:
+            with open(self.path, "a") as f:
+                f.write(line + "\n")
+
+
+class WebhookSink:
+    """
+    POSTs events as JSON to a webhook URL.
+    """
+
+    def __init__(self, url, timeout=10):
+        self.url = url
+        self.timeout = timeout
+
+    def emit(self, event):
+        try:
+            requests.post(self.url, json=event, timeout=self.timeout).raise_for_status()
+        except requests.exceptions.RequestException as e:
+            print(f"Webhook error for {event['ticker']}: {e}", file=sys.stderr)
+
+
+def load_state(path):
+    """
+    Loads the last persisted signal per ticker, or an empty state if none exists yet.
+    """
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_state(path, state):
+    """
+    Persists the state atomically so a crash never leaves a truncated file.
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+def evaluate_ticker(ticker, previous=None, max_cost=2000):
+    """
+    Computes the current signal and top contract for a ticker.
+    The option chain is only scanned again if the signal or latest bar changed since the previous state.
+    Returns a state dict, or None if no price data is available or any input is a quota fallback,
+    so a partial evaluation never replaces the previous state or emits an event.
+    """
+    stock_data = get_stock_data(ticker)
+    if stock_data is None:
+        return None
+
+    sentiment, sentiment_error = get_sentiment(ticker)
+    news = get_company_news(ticker)
+    advanced_data = get_advanced_data(ticker)
+    if sentiment_error == SENTIMENT_RATE_LIMITED or news is None or advanced_data is None:
+        print(f"Skipping {ticker}: provider quota exhausted and no cached data", file=sys.stderr)
+        return None
+
+    news_score = calculate_news_sentiment(news)
+    analyst_score = calculate_analyst_sentiment(advanced_data.get('recommendations'))
+    signal = generate_suggestion(stock_data, sentiment=None if sentiment_error else sentiment, news_sentiment=news_score, analyst_sentiment=analyst_score)
+
+    price = float(stock_data['Close'].iloc[-1])
+    fingerprint = f"{stock_data.index[-1]:%Y-%m-%d}|{price:.2f}|{signal}"
+    if previous and previous.get('fingerprint') == fingerprint:
+        contract = previous.get('contract')
+    elif signal in ["Call", "Put"]:
+        contracts, _ = find_options_contracts(ticker, signal, max_cost=max_cost, underlying_price=price)
+        contract = str(contracts.iloc[0]['contractSymbol']) if contracts is not None and not contracts.empty else None
+    else:
+        contract = None
+
+    return {'signal': signal, 'contract': contract, 'price': round(price, 2), 'fingerprint': fingerprint}
+
+
+def run_cycle(watchlist, state, sinks, evaluate=evaluate_ticker):
+    """
+    Re-evaluates every ticker and emits an event for each one whose signal or top contract changed.
+    Returns the new state, containing only tickers still on the watchlist.
+    """
+    new_state = {}
+    with request_priority(BACKGROUND):
+        for ticker in watchlist:
+            previous = state.get(ticker)
+            try:
+                current = evaluate(ticker, previous)
+            except Exception as e:
+                print(f"Error evaluating {ticker}: {e}", file=sys.stderr)
+                current = None
+            if current is None:
+                if previous is not None:
+                    new_state[ticker] = previous
+                continue
+
+            new_state[ticker] = current
+            if previous is None or (previous['signal'], previous['contract']) != (current['signal'], current['contract']):
+                event = {
+                    'time': datetime.now().isoformat(timespec='seconds'),
+                    'ticker': ticker,
+                    'previous_signal': previous['signal'] if previous else None,
+                    'signal': current['signal'],
+                    'previous_contract': previous['contract'] if previous else None,
+                    'contract': current['contract'],
+                    'price': current['price'],
+                }
+                for sink in sinks:
+                    sink.emit(event)
+    return new_state
+
+
+def main():
+    """
+    Runs the alert daemon.
+    """
+    parser = argparse.ArgumentParser(description="Watch the watchlist and emit an event when a signal changes.")
+    parser.add_argument("--watchlist", type=str, default="watchlist.txt", help="Path to the watchlist file (seeds the shared watchlist if a cache backend is configured)")
+    parser.add_argument("--state", type=str, default="alerts_state.json", help="Path to the persisted signal state")
+    parser.add_argument("--interval", type=int, default=900, help="Seconds between scans")
+    parser.add_argument("--events", type=str, default=None, help="Append events to this JSONL file (default: stdout)")
+    parser.add_argument("--webhook", type=str, default=None, help="Also POST events to this URL")
+    parser.add_argument("--max-cost", type=float, default=2000, help="Max option cost ($) for contract suggestions")
+    parser.add_argument("--once", action="store_true", help="Run a single scan and exit")
+    args = parser.parse_args()
+
+    sinks = [JsonlSink(args.events)]
+    if args.webhook:
+        sinks.append(WebhookSink(args.webhook))
+
+    def evaluate(ticker, previous):
+        return evaluate_ticker(ticker, previous, max_cost=args.max_cost)
+
+    state = load_state(args.state)
+    while True:
+        started = time.monotonic()
+        state = run_cycle(load_watchlist(args.watchlist), state, sinks, evaluate)
+        save_state(args.state, state)
+        if args.once:
+            break
+        print(f"Scan finished in {time.monotonic() - started:.1f}s; cache: {get_cache_stats()['memory']}", file=sys.stderr)
+        # Keep a fixed cadence regardless of how long the scan took
+        time.sleep(max(0, args.interval - (time.monotonic() - started)))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,22 @@
 import finnhub
 import src.config as config
+from src.scheduler import QuotaExceeded, SCHEDULER
 
 def get_finnhub_client():
     """
     Initializes and returns a Finnhub client.
     """
     return finnhub.Client(api_key=config.FINNHUB_API_KEY)
+
+def call_finnhub(call_lambda):
+    """
+    Runs a Finnhub client call through the quota scheduler.
+    A 429 response marks the budget as spent and raises QuotaExceeded.
+    """
+    try:
+        return SCHEDULER.call('finnhub', call_lambda)
+    except finnhub.FinnhubAPIException as e:
+        if e.status_code == 429:
+            SCHEDULER.exhaust('finnhub')
+            raise QuotaExceeded("finnhub API rate limit reached") from e
+        raise
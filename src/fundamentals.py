@@ -0,0 +1,136 @@
+import sys
+import threading
+
+import src.config as config
+from src.cache import BACKEND, SQLiteBackend, cached, deserialize, serialize
+from src.compact import FILING_FIELDS, METRIC_FIELDS, pick_fields, normalize_financials
+from src.finnhub_client import call_finnhub, get_finnhub_client
+from src.scheduler import QuotaExceeded
+
+# Periodic reports whose filing changes the reported financials.
+REPORT_FORMS = {'10-Q', '10-K', '10-Q/A', '10-K/A', '20-F', '40-F'}
+
+
+class FundamentalsStore:
+    """
+    Stores normalized fundamentals per ticker without expiry, in the shared cache backend
+    if one is configured (so replicas share them) or in a local SQLite file otherwise.
+    """
+
+    def __init__(self, backend=None):
+        self._backend = backend
+        self._memory = {}
+        self._lock = threading.Lock()
+
+    @property
+    def backend(self):
+        # Resolved on first use so importing the module doesn't create a database file
+        if self._backend is None:
+            self._backend = BACKEND or SQLiteBackend(config.FUNDAMENTALS_DB_PATH)
+        return self._backend
+
+    def get(self, ticker, refresh=False):
+        """
+        Returns the stored fundamentals for ticker, or None.
+        With refresh, skips the in-process copy to pick up data stored by other replicas.
+        """
+        with self._lock:
+            if ticker in self._memory and not refresh:
+                return self._memory[ticker]
+        try:
+            payload = self.backend.get(f"fundamentals:{ticker}")
+            if payload is None:
+                return None
+            value, _ = deserialize(payload)
+        except Exception as e:
+            # Unreachable backend or a corrupt/incompatible payload: treat as a miss so it is refetched
+            print(f"Fundamentals store read error for {ticker}: {e}", file=sys.stderr)
+            return None
+        with self._lock:
+            self._memory[ticker] = value
+        return value
+
+    def set(self, ticker, value):
+        with self._lock:
+            self._memory[ticker] = value
+        try:
+            self.backend.set(f"fundamentals:{ticker}", serialize(value))
+        except Exception as e:
+            print(f"Fundamentals store write error for {ticker}: {e}", file=sys.stderr)
+
+
+def latest_report_date(filings):
+    """
+    Returns the filing date of the most recent 10-Q/10-K style report, or None.
+    """
+    dates = [f.get('filedDate') for f in filings or [] if f.get('form') in REPORT_FORMS and f.get('filedDate')]
+    return max(dates) if dates else None
+
+
+def get_fundamentals(ticker, store=None):
+    """
+    Returns normalized fundamentals for a ticker: 'financials', 'filings' and 'latest_report'.
+
+    The cheap filings listing is checked first; financials_reported is only refetched when a
+    report newer than the stored one has been filed. Otherwise the stored data is served
+    indefinitely. Returns None if nothing could be fetched or loaded.
+    """
+    store = store or STORE
+    client = get_finnhub_client()
+    stored = store.get(ticker)
+
+    try:
+        filings = call_finnhub(lambda: client.filings(symbol=ticker)) or []
+    except Exception as e:
+        print(f"Finnhub API error for {ticker}: {e}", file=sys.stderr)
+        if stored is not None:
+            return stored
+        if isinstance(e, QuotaExceeded):
+            raise
+        return None
+
+    recent_filings = [pick_fields(f, FILING_FIELDS) for f in filings[:5]]
+    latest_report = latest_report_date(filings)
+
+    if stored is not None and stored['latest_report'] != latest_report:
+        # Another replica may already have fetched the new report
+        stored = store.get(ticker, refresh=True) or stored
+
+    if stored is not None and stored['latest_report'] == latest_report:
+        if stored['filings'] != recent_filings:
+            stored = dict(stored, filings=recent_filings)
+            store.set(ticker, stored)
+        return stored
+
+    try:
+        financials = call_finnhub(lambda: client.financials_reported(symbol=ticker, freq='quarterly'))
+    except QuotaExceeded:
+        # Serve the previous report until there is budget to fetch the new one
+        if stored is not None:
+            return stored
+        raise
+    except Exception as e:
+        print(f"Finnhub API error for {ticker}: {e}", file=sys.stderr)
+        return stored
+
+    fundamentals = {
+        'latest_report': latest_report,
+        'financials': normalize_financials(financials),
+        'filings': recent_filings,
+    }
+    store.set(ticker, fundamentals)
+    return fundamentals
+
+
+@cached(ttl=24 * 3600)
+def get_basic_metrics(ticker):
+    """
+    Returns price-derived metrics (P/E, EPS, 52-week range) as {'metric': {...}}, or None.
+    These move with the share price, so they expire daily rather than waiting for a new report.
+    """
+    client = get_finnhub_client()
+    metric = (call_finnhub(lambda: client.company_basic_financials(ticker, 'all')) or {}).get('metric') or {}
+    return {'metric': pick_fields(metric, METRIC_FIELDS)} if metric else None
+
+
+STORE = FundamentalsStore()
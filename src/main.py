@@ -14,17 +14,19 @@ def main():
     stock_data = get_stock_data(ticker)
 
     if stock_data is not None:
-        sentiment, _ = get_sentiment(ticker)
+        sentiment, sentiment_error = get_sentiment(ticker)
+        if sentiment_error:
+            sentiment = None
         
         news = get_company_news(ticker)
         news_score = calculate_news_sentiment(news)
         
-        adv_data = get_advanced_data(ticker)
+        adv_data = get_advanced_data(ticker) or {}
         analyst_score = calculate_analyst_sentiment(adv_data.get('recommendations'))
         
         suggestion = generate_suggestion(stock_data, sentiment=sentiment, news_sentiment=news_score, analyst_sentiment=analyst_score)
-        print(f"Alpha Vantage Sentiment: {sentiment:.2f}")
-        print(f"News Sentiment: {news_score:.2f}")
+        print(f"Alpha Vantage Sentiment: {sentiment:.2f}" if sentiment is not None else f"Alpha Vantage Sentiment: N/A ({sentiment_error})")
+        print(f"News Sentiment: {news_score:.2f}" if news_score is not None else "News Sentiment: N/A")
         print(f"Analyst Sentiment: {analyst_score:.2f}" if analyst_score is not None else "Analyst Sentiment: N/A")
         print(f"Suggestion for {ticker}: {suggestion}")
 
@@ -37,7 +39,7 @@ def main():
                 print(f"\n--- Top 5 Suggested {suggestion} Options (Exp: {expiration_date}) ---")
                 for _, contract in contracts.iterrows():
                     print(f"Symbol: {contract['contractSymbol']}")
-                    print(f"Strike: {contract['strike']} | Price: {contract['lastPrice']} | Breakeven: {contract['Breakeven']:.2f}")
+                    print(f"Strike: {contract['strike']} | Premium: {contract['premium']:.2f} (last {contract['lastPrice']}) | Breakeven: {contract['Breakeven']:.2f}")
                     print(f"PoP: {contract['PoP']}")
                     print(f"Risk: {contract['Risk Level']}")
                     print(f"Reasoning: {contract['Reasoning']}")
@@ -0,0 +1,165 @@
+import contextvars
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import src.config as config
+
+# Request priorities, most valuable first.
+INTERACTIVE = 0
+BACKGROUND = 1
+BULK = 2
+
+_priority = contextvars.ContextVar('request_priority', default=INTERACTIVE)
+
+
+class QuotaExceeded(Exception):
+    """
+    Raised when a provider call cannot be made within the provider's remaining budget.
+    """
+
+
+@contextmanager
+def request_priority(priority):
+    """
+    Sets the priority of provider calls made inside the block (INTERACTIVE, BACKGROUND or BULK).
+    """
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class ProviderBudget:
+    """
+    Sliding-window call budget for one provider, e.g. 60 calls per 60 seconds.
+    """
+
+    def __init__(self, limit, period):
+        self.limit = limit
+        self.period = period
+        self._calls = deque()
+
+    def _expire(self, now):
+        while self._calls and self._calls[0] <= now - self.period:
+            self._calls.popleft()
+
+    def remaining(self, now):
+        self._expire(now)
+        return self.limit - len(self._calls)
+
+    def next_slot(self, now):
+        """
+        Returns the number of seconds until the oldest call in the window expires.
+        """
+        self._expire(now)
+        if not self._calls:
+            return 0.0
+        return self._calls[0] + self.period - now
+
+    def record(self, now):
+        self._calls.append(now)
+
+    def exhaust(self, now):
+        """
+        Marks the whole window as used, e.g. after the provider reports a rate limit.
+        """
+        self._expire(now)
+        while len(self._calls) < self.limit:
+            self._calls.append(now)
+
+
+class QuotaScheduler:
+    """
+    Admits provider calls in priority order within each provider's budget.
+
+    Lower priorities may not dip into the share of the budget reserved for higher ones,
+    so background refreshes and bulk backtests leave room for interactive requests.
+    A call that cannot be admitted before its deadline raises QuotaExceeded.
+    """
+
+    # Fraction of each budget that calls of the given priority must leave unused.
+    RESERVE = {INTERACTIVE: 0.0, BACKGROUND: 0.2, BULK: 0.5}
+    # Longest time (seconds) a call of the given priority waits for budget before giving up.
+    # Bulk work gives up well within a Finnhub window so backfills stop early instead of stalling requests.
+    MAX_WAIT = {INTERACTIVE: 5.0, BACKGROUND: 30.0, BULK: 10.0}
+
+    def __init__(self, budgets):
+        self.budgets = budgets
+        self.admitted = {name: 0 for name in budgets}
+        self.rejected = {name: 0 for name in budgets}
+        self._waiting = {name: [] for name in budgets}
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+
+    def call(self, provider, func, priority=None):
+        """
+        Runs func() once the provider's budget allows it. Providers without a budget run immediately.
+        """
+        if provider in self.budgets:
+            self._acquire(provider, _priority.get() if priority is None else priority)
+        return func()
+
+    def exhaust(self, provider):
+        """
+        Treats the provider's budget as spent for the current window.
+        """
+        with self._cond:
+            self.budgets[provider].exhaust(time.time())
+
+    def stats(self):
+        """
+        Returns remaining budget and admitted/rejected call counts per provider.
+        """
+        with self._cond:
+            now = time.time()
+            return {
+                name: {
+                    'remaining': budget.remaining(now),
+                    'limit': budget.limit,
+                    'admitted': self.admitted[name],
+                    'rejected': self.rejected[name],
+                    'waiting': len(self._waiting[name]),
+                }
+                for name, budget in self.budgets.items()
+            }
+
+    def _acquire(self, provider, priority):
+        budget = self.budgets[provider]
+        waiting = self._waiting[provider]
+        reserve = self.RESERVE[priority] * budget.limit
+        deadline = time.time() + self.MAX_WAIT[priority]
+        ticket = (priority, next(self._counter))
+
+        with self._cond:
+            heapq.heappush(waiting, ticket)
+            try:
+                while True:
+                    now = time.time()
+                    first = waiting[0] == ticket
+                    if first and budget.remaining(now) > reserve:
+                        heapq.heappop(waiting)
+                        budget.record(now)
+                        self.admitted[provider] += 1
+                        return
+                    # Waiting behind higher-priority calls, or for budget to free up
+                    wait = budget.next_slot(now) if first else deadline - now
+                    if now >= deadline or now + wait > deadline:
+                        self.rejected[provider] += 1
+                        raise QuotaExceeded(f"{provider} API budget exhausted")
+                    self._cond.wait(timeout=max(wait, 0.01))
+            finally:
+                if ticket in waiting:
+                    waiting.remove(ticket)
+                    heapq.heapify(waiting)
+                self._cond.notify_all()
+
+
+SCHEDULER = QuotaScheduler({
+    'finnhub': ProviderBudget(config.FINNHUB_CALLS_PER_MINUTE, 60),
+    'alphavantage': ProviderBudget(config.ALPHA_VANTAGE_CALLS_PER_DAY, 24 * 3600),
+})
@@ -0,0 +1,176 @@
+import sqlite3
+import sys
+from contextlib import closing
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+import src.config as config
+from src.analysis import calculate_news_sentiment, calculate_analyst_sentiment
+from src.finnhub_client import call_finnhub, get_finnhub_client
+from src.scheduler import BULK, QuotaExceeded, request_priority
+
+# Finnhub serves roughly one year of company news on the free tier.
+MAX_NEWS_HISTORY_DAYS = 365
+
+MARKET_TIMEZONE = 'America/New_York'
+MARKET_CLOSE_HOUR = 16
+
+
+def session_dates(timestamps):
+    """
+    Maps article timestamps (epoch seconds) to the trading day they can first affect, as a Series
+    of dates: articles published after the 16:00 US/Eastern close or on a weekend count towards
+    the next weekday, so a backtest trading at a day's close never sees news from after it.
+    """
+    published = pd.to_datetime(pd.Series(timestamps, dtype='int64'), unit='s', utc=True).dt.tz_convert(MARKET_TIMEZONE)
+    days = published.dt.tz_localize(None).dt.normalize()
+    days = days.where(published.dt.hour < MARKET_CLOSE_HOUR, days + pd.Timedelta(days=1))
+    weekday = days.dt.dayofweek
+    return days + pd.to_timedelta((7 - weekday).where(weekday >= 5, 0), unit='D')
+
+
+class SentimentStore:
+    """
+    Append-only local store of per-ticker news and analyst sentiment.
+
+    Articles are deduplicated by Finnhub article id and analyst trends by period,
+    so repeated backfills and overlapping ranges never double count.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or config.SENTIMENT_DB_PATH
+        with closing(self._connect()) as conn, conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS news (
+                    ticker TEXT, id INTEGER, datetime INTEGER, date TEXT, score REAL,
+                    PRIMARY KEY (ticker, id)
+                );
+                CREATE TABLE IF NOT EXISTS analyst (
+                    ticker TEXT, period TEXT, score REAL,
+                    PRIMARY KEY (ticker, period)
+                );
+                CREATE TABLE IF NOT EXISTS fetched_days (
+                    ticker TEXT, date TEXT,
+                    PRIMARY KEY (ticker, date)
+                );
+            """)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def add_news(self, ticker, news_items):
+        """
+        Scores and stores news articles. Articles already stored are ignored.
+        """
+        items = [item for item in news_items or [] if item.get('id') is not None and item.get('datetime') is not None]
+        days = session_dates([item['datetime'] for item in items]).dt.strftime('%Y-%m-%d')
+        rows = [(ticker, item['id'], item['datetime'], day, calculate_news_sentiment([item])) for item, day in zip(items, days)]
+        with closing(self._connect()) as conn, conn:
+            conn.executemany("INSERT OR IGNORE INTO news VALUES (?, ?, ?, ?, ?)", rows)
+
+    def add_recommendations(self, ticker, recommendations):
+        """
+        Stores monthly analyst recommendation trends. Periods already stored are ignored.
+        """
+        rows = [(ticker, rec['period'], calculate_analyst_sentiment([rec]))
+                for rec in recommendations or [] if rec.get('period')]
+        with closing(self._connect()) as conn, conn:
+            conn.executemany("INSERT OR IGNORE INTO analyst VALUES (?, ?, ?)", rows)
+
+    def backfill(self, ticker, start, end, chunk_days=7):
+        """
+        Fetches company news for [start, end] in chunks of chunk_days, skipping days already fetched,
+        plus the latest analyst trends. Runs at bulk priority; stops early (resumable) when out of quota.
+        A chunk that fails with a provider error is skipped and not marked fetched, so the next
+        backfill retries it. Returns the number of news requests made.
+        """
+        start = max(start, date.today() - timedelta(days=MAX_NEWS_HISTORY_DAYS))
+        end = min(end, date.today())
+        fetched = self._fetched_days(ticker, start, end)
+        client = get_finnhub_client()
+        requests_made = 0
+
+        with request_priority(BULK):
+            try:
+                try:
+                    self.add_recommendations(ticker, call_finnhub(lambda: client.recommendation_trends(ticker)))
+                except QuotaExceeded:
+                    raise
+                except Exception as e:
+                    print(f"Finnhub API error for {ticker} recommendations: {e}", file=sys.stderr)
+
+                chunk_start = start
+                while chunk_start <= end:
+                    chunk_end = min(chunk_start + timedelta(days=chunk_days - 1), end)
+                    days = [chunk_start + timedelta(days=i) for i in range((chunk_end - chunk_start).days + 1)]
+                    if any(day.isoformat() not in fetched for day in days):
+                        requests_made += 1
+                        try:
+                            news = call_finnhub(lambda: client.company_news(ticker, _from=chunk_start.isoformat(), to=chunk_end.isoformat()))
+                            self.add_news(ticker, news)
+                        except QuotaExceeded:
+                            raise
+                        except Exception as e:
+                            print(f"Finnhub API error for {ticker} news {chunk_start} to {chunk_end}: {e}", file=sys.stderr)
+                        else:
+                            # Today is still receiving news, so it is fetched again next time
+                            self._mark_fetched(ticker, [day for day in days if day < date.today()])
+                    chunk_start = chunk_end + timedelta(days=1)
+            except QuotaExceeded as e:
+                print(f"Sentiment backfill for {ticker} stopped early: {e}", file=sys.stderr)
+
+        return requests_made
+
+    def daily_series(self, ticker, start, end, window_days=2):
+        """
+        Returns a DataFrame indexed by calendar day with 'news_sentiment' and 'analyst_sentiment'.
+
+        news_sentiment is the average article score over the trailing window_days, matching the
+        yesterday-to-today window used by get_company_news; it is NaN for days never fetched.
+        Articles are bucketed by trading session (see session_dates), not calendar day.
+        analyst_sentiment carries each monthly period forward until the next one.
+        """
+        days = pd.date_range(start, end, freq='D')
+        with closing(self._connect()) as conn:
+            # Sessions are re-derived from the publish time, so rows stored before bucketing
+            # by session are handled too; the margins cover weekend roll-forward
+            news = pd.read_sql_query(
+                "SELECT datetime, score FROM news WHERE ticker = ? AND datetime BETWEEN ? AND ?",
+                conn, params=(ticker, int((days[0] - timedelta(days=window_days + 3)).timestamp()),
+                              int((days[-1] + timedelta(days=1)).timestamp())),
+            )
+            analyst = pd.read_sql_query(
+                "SELECT period, score FROM analyst WHERE ticker = ? ORDER BY period", conn, params=(ticker,),
+            )
+        fetched = self._fetched_days(ticker, days[0].date() - timedelta(days=window_days), days[-1].date())
+
+        window = pd.date_range(days[0] - timedelta(days=window_days - 1), days[-1], freq='D')
+        news = news.groupby(session_dates(news['datetime']).to_numpy())['score'].agg(total='sum', count='count')
+        news = news.reindex(window, fill_value=0)
+        rolling = news.rolling(window_days, min_periods=1).sum()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            news_sentiment = (rolling['total'] / rolling['count']).fillna(0.0)
+        was_fetched = pd.Series(window.strftime('%Y-%m-%d').isin(fetched), index=window)
+        news_sentiment[~was_fetched] = np.nan
+
+        analyst_sentiment = pd.Series(analyst['score'].to_numpy(), index=pd.to_datetime(analyst['period']))
+        analyst_sentiment = analyst_sentiment.reindex(analyst_sentiment.index.union(days)).ffill().reindex(days)
+
+        return pd.DataFrame({
+            'news_sentiment': news_sentiment.reindex(days).astype('float32'),
+            'analyst_sentiment': analyst_sentiment.astype('float32'),
+        })
+
+    def _fetched_days(self, ticker, start, end):
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT date FROM fetched_days WHERE ticker = ? AND date BETWEEN ? AND ?",
+                (ticker, start.isoformat(), end.isoformat()),
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def _mark_fetched(self, ticker, days):
+        with closing(self._connect()) as conn, conn:
+            conn.executemany("INSERT OR IGNORE INTO fetched_days VALUES (?, ?)", [(ticker, day.isoformat()) for day in days])
@@ -0,0 +1,63 @@
+import threading
+
+
+class _Call:
+    """
+    An in-flight call whose result is shared with any duplicate callers.
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Deduplicates concurrent calls with the same key: the first caller runs the function,
+    later callers wait for it and receive the same result (or exception).
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.coalesced = 0
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, func):
+        """
+        Runs func() unless a call for key is already in flight, in which case waits for its result.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self.calls += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self):
+        """
+        Returns a dict with the number of executed and coalesced calls.
+        """
+        with self._lock:
+            return {'calls': self.calls, 'coalesced': self.coalesced, 'in_flight': len(self._calls)}
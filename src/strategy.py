@@ -0,0 +1,172 @@
+import json
+import operator
+
+import numpy as np
+import pandas as pd
+import pandas_ta_classic as ta
+
+from src.compact import PRICE_COLUMNS
+
+SENTIMENT_THRESHOLD = 0.15 # Minimum effective sentiment to confirm a technical signal
+
+# The SMA 50/200 trend + RSI strategy used by live suggestions and backtests.
+# Conditions compare an indicator or price column against another column or a number.
+DEFAULT_STRATEGY = {
+    'name': 'sma_trend_rsi',
+    'indicators': {
+        'RSI_14': {'kind': 'rsi', 'length': 14},
+        'SMA_50': {'kind': 'sma', 'length': 50},
+        'SMA_200': {'kind': 'sma', 'length': 200},
+    },
+    'signals': {
+        'Call': {
+            'all': [['SMA_50', '>', 'SMA_200'], ['RSI_14', '<', 70], ['Close', '>', 'SMA_50']],
+            'sentiment': ['>', SENTIMENT_THRESHOLD],
+        },
+        'Put': {
+            'all': [['SMA_50', '<', 'SMA_200'], ['RSI_14', '>', 30], ['Close', '<', 'SMA_50']],
+            'sentiment': ['<', -SENTIMENT_THRESHOLD],
+        },
+    },
+    'default': 'Hold',
+}
+
+INDICATORS = {
+    'sma': lambda data, length: ta.sma(data['Close'], length=length),
+    'ema': lambda data, length: ta.ema(data['Close'], length=length),
+    'rsi': lambda data, length: ta.rsi(data['Close'], length=length),
+}
+
+OPERATORS = {'>': operator.gt, '<': operator.lt, '>=': operator.ge, '<=': operator.le}
+
+
+class CompiledStrategy:
+    """
+    A strategy definition compiled into vectorized evaluators.
+
+    Each distinct indicator is computed once per frame (and not at all if the column
+    already exists), then every signal's conditions are evaluated as array operations
+    over all bars, or just the latest one.
+    """
+
+    def __init__(self, name, indicators, signals, default):
+        self.name = name
+        self.indicators = indicators  # column -> (kind, params), deduplicated
+        self.signals = signals  # [(signal, [(left, op, right)], combine, gate)]
+        self.default = default
+
+    def add_indicators(self, data):
+        """
+        Returns a copy of data with any missing indicator columns appended.
+        """
+        data = data.copy()
+        computed = {}
+        for column, spec in self.indicators.items():
+            if column in data:
+                continue
+            if spec not in computed:
+                kind, params = spec
+                computed[spec] = INDICATORS[kind](data, **dict(params))
+            data[column] = computed[spec]
+        return data
+
+    def signal_masks(self, data, sentiment=None):
+        """
+        Returns a DataFrame of booleans, one column per signal, for every bar in data.
+        sentiment may be None, a number, or an array aligned with data; NaN means no sentiment
+        is available, in which case signals are not gated on it.
+        """
+        columns = {column: data[column].to_numpy(dtype=float) for column in data.columns if column in self._columns}
+        if sentiment is None:
+            sentiment = np.nan
+        sentiment = np.broadcast_to(np.asarray(sentiment, dtype=float), len(data))
+        agnostic = np.isnan(sentiment)
+
+        masks = {}
+        for signal, conditions, combine, gate in self.signals:
+            results = [op(self._operand(left, columns), self._operand(right, columns)) for left, op, right in conditions]
+            mask = np.logical_and.reduce(results) if combine == 'all' else np.logical_or.reduce(results)
+            if gate is not None:
+                op, threshold = gate
+                with np.errstate(invalid='ignore'):
+                    mask = mask & (agnostic | op(sentiment, threshold))
+            masks[signal] = np.broadcast_to(mask, len(data))
+        return pd.DataFrame(masks, index=data.index)
+
+    def evaluate(self, data, sentiment=None, latest_only=False):
+        """
+        Returns a Series with the signal name (or the default) for each bar.
+        With latest_only, only the last bar is evaluated.
+        """
+        data = self.add_indicators(data)
+        if latest_only:
+            data = data.iloc[-1:]
+            if sentiment is not None and np.ndim(sentiment):
+                sentiment = np.asarray(sentiment)[-1:]
+        masks = self.signal_masks(data, sentiment)
+        result = np.full(len(data), self.default, dtype=object)
+        # Earlier signals take precedence
+        for signal in reversed(masks.columns):
+            result[masks[signal].to_numpy()] = signal
+        return pd.Series(result, index=data.index, name=self.name)
+
+    @property
+    def _columns(self):
+        return {operand for _, conditions, _, _ in self.signals for left, _, right in conditions
+                for operand in (left, right) if isinstance(operand, str)}
+
+    @staticmethod
+    def _operand(operand, columns):
+        return columns[operand] if isinstance(operand, str) else operand
+
+
+def compile_strategy(definition):
+    """
+    Validates a strategy definition (see DEFAULT_STRATEGY) and compiles it.
+    Raises ValueError for unknown indicator kinds, operators, operands or condition groups.
+    """
+    indicators = {}
+    for column, spec in definition.get('indicators', {}).items():
+        spec = dict(spec)
+        kind = spec.pop('kind')
+        if kind not in INDICATORS:
+            raise ValueError(f"Unknown indicator kind '{kind}' for {column}")
+        indicators[column] = (kind, tuple(sorted(spec.items())))
+
+    signals = []
+    for signal, rule in definition.get('signals', {}).items():
+        combine = 'all' if 'all' in rule else 'any'
+        if combine not in rule:
+            raise ValueError(f"Signal '{signal}' needs an 'all' or 'any' list of conditions")
+        conditions = []
+        for left, op, right in rule[combine]:
+            if op not in OPERATORS:
+                raise ValueError(f"Unknown operator '{op}' in signal '{signal}'")
+            for operand in (left, right):
+                if isinstance(operand, str):
+                    if operand not in indicators and operand not in PRICE_COLUMNS:
+                        raise ValueError(f"Unknown column '{operand}' in signal '{signal}': "
+                                         f"define it under 'indicators' or use one of {PRICE_COLUMNS}")
+                elif isinstance(operand, bool) or not isinstance(operand, (int, float)):
+                    raise ValueError(f"Operand {operand!r} in signal '{signal}' must be a column name or a number")
+            conditions.append((left, OPERATORS[op], right))
+        gate = None
+        if rule.get('sentiment') is not None:
+            op, threshold = rule['sentiment']
+            if op not in OPERATORS:
+                raise ValueError(f"Unknown operator '{op}' in sentiment gate of '{signal}'")
+            gate = (OPERATORS[op], float(threshold))
+        signals.append((signal, conditions, combine, gate))
+
+    return CompiledStrategy(definition.get('name', 'strategy'), indicators, signals, definition.get('default', 'Hold'))
+
+
+def load_strategy(path):
+    """
+    Loads and compiles a strategy definition from a JSON file.
+    """
+    with open(path) as f:
+        return compile_strategy(json.load(f))
+
+
+DEFAULT = compile_strategy(DEFAULT_STRATEGY)
@@ -0,0 +1,143 @@
+import numpy as np
+import pandas as pd
+
+SQRT_2PI = np.sqrt(2 * np.pi)
+
+# Search bounds for implied volatility
+MIN_VOL = 1e-4
+MAX_VOL = 5.0
+
+
+def norm_pdf(x):
+    return np.exp(-0.5 * np.square(x)) / SQRT_2PI
+
+
+def norm_cdf(x):
+    """
+    Standard normal CDF for arrays (Abramowitz & Stegun 26.2.17, |error| < 7.5e-8).
+    Avoids a scipy dependency.
+    """
+    x = np.asarray(x, dtype=float)
+    z = np.abs(x)
+    t = 1.0 / (1.0 + 0.2316419 * z)
+    poly = t * (0.319381530 + t * (-0.356563782 + t * (1.781477937 + t * (-1.821255978 + t * 1.330274429))))
+    upper = norm_pdf(z) * poly
+    return np.where(x >= 0, 1.0 - upper, upper)
+
+
+def _d1(S, K, T, r, sigma):
+    return (np.log(S / K) + (r + 0.5 * sigma ** 2) * T) / (sigma * np.sqrt(T))
+
+
+def bs_price(S, K, T, r, sigma, is_call):
+    """
+    Black-Scholes price of European options. All arguments broadcast as numpy arrays.
+    """
+    d1 = _d1(S, K, T, r, sigma)
+    d2 = d1 - sigma * np.sqrt(T)
+    discount = np.exp(-r * T)
+    call = S * norm_cdf(d1) - K * discount * norm_cdf(d2)
+    put = K * discount * norm_cdf(-d2) - S * norm_cdf(-d1)
+    return np.where(is_call, call, put)
+
+
+def bs_vega(S, K, T, r, sigma):
+    return S * norm_pdf(_d1(S, K, T, r, sigma)) * np.sqrt(T)
+
+
+def bs_delta(S, K, T, r, sigma, is_call):
+    """
+    Black-Scholes delta for arrays of options. Returns 0 where T or sigma is not positive.
+    """
+    S, K, sigma = np.broadcast_arrays(*(np.asarray(a, dtype=float) for a in (S, K, sigma)))
+    valid = (T > 0) & (sigma > 0)
+    safe_sigma = np.where(valid, sigma, 1.0)
+    cdf = norm_cdf(_d1(S, K, max(T, 1e-12), r, safe_sigma))
+    return np.where(valid, np.where(is_call, cdf, cdf - 1), 0.0)
+
+
+def implied_volatility(price, S, K, T, r, is_call, tol=1e-6, max_iter=100):
+    """
+    Inverts Black-Scholes for a whole array of option prices at once.
+
+    Uses Newton steps, falling back to bisection whenever a step would leave the
+    bracket known to contain the root. Returns NaN for prices outside no-arbitrage
+    bounds or that fail to converge.
+    """
+    price, K, is_call = np.broadcast_arrays(
+        np.asarray(price, dtype=float), np.asarray(K, dtype=float), np.asarray(is_call, dtype=bool)
+    )
+    iv = np.full(price.shape, np.nan)
+    if T <= 0:
+        return iv
+
+    discount = np.exp(-r * T)
+    lower = np.where(is_call, np.maximum(S - K * discount, 0.0), np.maximum(K * discount - S, 0.0))
+    upper = np.where(is_call, S, K * discount)
+    active = np.isfinite(price) & (price > lower) & (price < upper)
+
+    lo = np.full(price.shape, MIN_VOL)
+    hi = np.full(price.shape, MAX_VOL)
+    # Brenner-Subrahmanyam approximation as the starting point
+    sigma = np.clip(np.sqrt(2 * np.pi / T) * price / S, 0.05, 2.0)
+
+    for _ in range(max_iter):
+        if not active.any():
+            break
+        diff = bs_price(S, K, T, r, sigma, is_call) - price
+        converged = active & (np.abs(diff) < tol)
+        iv[converged] = sigma[converged]
+        active &= ~converged
+
+        # Price is increasing in volatility, so the sign of diff narrows the bracket
+        hi = np.where(active & (diff > 0), sigma, hi)
+        lo = np.where(active & (diff < 0), sigma, lo)
+
+        vega = bs_vega(S, K, T, r, sigma)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            newton = sigma - diff / vega
+        use_newton = np.isfinite(newton) & (newton > lo) & (newton < hi)
+        sigma = np.where(active, np.where(use_newton, newton, 0.5 * (lo + hi)), sigma)
+
+    return iv
+
+
+def fit_iv_smile(calls, puts, S, T, r):
+    """
+    Solves implied volatility from bid/ask mid prices for both sides of a chain
+    and merges them into one smile per strike.
+
+    Out-of-the-money contracts are usually the more liquid side, so puts are used
+    below the underlying price and calls above; the other side fills gaps. Strikes
+    with no solvable price are interpolated from their neighbours.
+    Returns a DataFrame indexed by strike with an 'iv' column.
+    """
+    def solve(options, is_call):
+        if options is None or options.empty:
+            return pd.Series(dtype=float)
+        bid = options['bid'].to_numpy(dtype=float)
+        ask = options['ask'].to_numpy(dtype=float)
+        mid = np.where((bid > 0) & (ask >= bid), 0.5 * (bid + ask), options['lastPrice'].to_numpy(dtype=float))
+        strikes = options['strike'].to_numpy(dtype=float)
+        iv = implied_volatility(mid, S, strikes, T, r, is_call)
+        return pd.Series(iv, index=strikes).groupby(level=0).first()
+
+    call_iv = solve(calls, True)
+    put_iv = solve(puts, False)
+    strikes = call_iv.index.union(put_iv.index)
+    if strikes.empty:
+        return pd.DataFrame({'iv': pd.Series(dtype='float32')})
+
+    call_iv = call_iv.reindex(strikes)
+    put_iv = put_iv.reindex(strikes)
+    otm_call = strikes.to_numpy() >= S
+    iv = pd.Series(np.where(otm_call, call_iv, put_iv), index=strikes)
+    iv = iv.fillna(pd.Series(np.where(otm_call, put_iv, call_iv), index=strikes))
+
+    known = iv.notna().to_numpy()
+    if known.any():
+        iv[:] = np.interp(strikes.to_numpy(), strikes.to_numpy()[known], iv.to_numpy()[known])
+
+    surface = iv.astype('float32').to_frame('iv')
+    surface.index.name = 'strike'
+    return surface
@@ -0,0 +1,77 @@
+import sys
+import threading
+
+from src.cache import BACKEND, deserialize, serialize
+
+WATCHLIST_PATH = "watchlist.txt"
+WATCHLIST_KEY = "watchlist"
+
+_lock = threading.Lock()
+
+
+def _read_file(path):
+    try:
+        with open(path) as f:
+            return [line.strip().upper() for line in f if line.strip()]
+    except FileNotFoundError:
+        return []
+
+
+def _load(path, backend):
+    """
+    Returns (tickers, shared): shared is False when the file was used because the backend failed.
+    """
+    try:
+        payload = backend.get(WATCHLIST_KEY)
+        if payload is None:
+            return _read_file(path), True
+        tickers, _ = deserialize(payload)
+        return tickers, True
+    except Exception as e:
+        # A backend outage shouldn't break the page; the file is the best available copy
+        print(f"Shared watchlist read error: {e}", file=sys.stderr)
+        return _read_file(path), False
+
+
+def load_watchlist(path=WATCHLIST_PATH, backend=None):
+    """
+    Returns the watchlist tickers in the order they were added.
+
+    With a shared cache backend configured, the watchlist lives there so every replica sees
+    the same list; it is seeded from the watchlist file the first time. Otherwise, or while the
+    backend is unreachable, the file is used.
+    """
+    backend = backend or BACKEND
+    if backend is None:
+        return _read_file(path)
+    return _load(path, backend)[0]
+
+
+def add_to_watchlist(ticker, path=WATCHLIST_PATH, backend=None):
+    """
+    Appends a ticker to the watchlist unless it is already on it. Returns the updated watchlist.
+    """
+    backend = backend or BACKEND
+    ticker = ticker.strip().upper()
+    with _lock:
+        if backend is None:
+            tickers = _read_file(path)
+            if ticker not in tickers:
+                tickers.append(ticker)
+                with open(path, "a") as f:
+                    f.write(f"\n{ticker}")
+            return tickers
+
+        tickers, shared = _load(path, backend)
+        if ticker in tickers:
+            return tickers
+        tickers.append(ticker)
+        if not shared:
+            # Writing the file-based copy back would overwrite tickers added on other replicas
+            print(f"Shared watchlist unavailable; {ticker} was not saved", file=sys.stderr)
+            return tickers
+        try:
+            backend.set(WATCHLIST_KEY, serialize(tickers))
+        except Exception as e:
+            print(f"Shared watchlist write error for {ticker}: {e}", file=sys.stderr)
+    return tickers
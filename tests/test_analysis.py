@@ -5,7 +5,14 @@ import pytest
 # Add the parent directory to sys.path to allow importing modules from the root
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from src.analysis import calculate_news_sentiment, calculate_delta
+import pandas as pd
+from datetime import datetime, timedelta
+
+import src.analysis as analysis
+import src.cache as cache_module
+from src.cache import MemoryCache
+from src.scheduler import QuotaExceeded
+from src.analysis import calculate_news_sentiment, calculate_delta, find_options_contracts, generate_suggestion
 
 def test_calculate_news_sentiment():
     """Test the sentiment calculation logic with mocked news items."""
@@ -49,4 +56,56 @@ def test_calculate_delta():
     assert abs(put_delta - (call_delta - 1)) < 1e-9
     
     # Test invalid inputs (e.g., negative time) return 0.0
-    assert calculate_delta(S, K, -1, r, sigma, "Call") == 0.0
\ No newline at end of file
+    assert calculate_delta(S, K, -1, r, sigma, "Call") == 0.0
+
+def test_find_options_contracts_budget_uses_premium(monkeypatch):
+    """The budget applies to the bid/ask mid actually paid, not a stale last trade."""
+    expiration = (datetime.now() + timedelta(days=30)).strftime('%Y-%m-%d')
+    calls = pd.DataFrame({
+        'contractSymbol': ['STALE', 'FAIR'],
+        'strike': [102.0, 104.0],
+        'lastPrice': [0.5, 4.0],  # STALE last traded far below its current quote
+        'bid': [9.0, 2.5],
+        'ask': [11.0, 3.5],
+        'volume': [10, 10],
+        'openInterest': [500, 100],
+        'impliedVolatility': [0.3, 0.3],
+        'inTheMoney': [False, False],
+    })
+    monkeypatch.setattr(analysis, 'get_option_expirations', lambda ticker: [expiration])
+    monkeypatch.setattr(analysis, 'get_option_chain', lambda ticker, exp: (calls, calls.iloc[0:0]))
+    spots = []
+    monkeypatch.setattr(analysis, 'get_iv_surface', lambda ticker, exp, spot: spots.append(spot))
+    monkeypatch.setattr(analysis, 'get_latest_price', lambda ticker: pytest.fail("no extra spot price fetch"))
+
+    contracts, chosen = find_options_contracts('TEST', 'Call', max_cost=500, underlying_price=100.0)
+
+    assert chosen == expiration
+    # The smile is fitted at the same spot price used for delta
+    assert spots == [100.0]
+    assert list(contracts['contractSymbol']) == ['FAIR']
+    assert contracts['premium'].iloc[0] == 3.0
+    assert contracts['Breakeven'].iloc[0] == 107.0
+
+def test_quota_fallbacks_mean_unavailable(monkeypatch):
+    """Out of quota with nothing cached, news and advanced data are unavailable rather than a neutral vote."""
+    monkeypatch.setattr(cache_module, 'CACHE', MemoryCache(max_bytes=1024 * 1024))
+    monkeypatch.setattr(cache_module, 'BACKEND', None)
+
+    def spent(call_lambda):
+        raise QuotaExceeded("finnhub API budget exhausted")
+    monkeypatch.setattr(analysis, 'call_finnhub', spent)
+    monkeypatch.setattr(analysis, 'get_finnhub_client', lambda: None)
+    monkeypatch.setattr(analysis, 'get_fundamentals', lambda ticker: spent(None))
+
+    news = analysis.get_company_news('TEST')
+    assert news is None
+    assert calculate_news_sentiment(news) is None
+    assert analysis.get_advanced_data('TEST') is None
+
+    # An unavailable source is left out of the vote instead of pulling the average towards neutral
+    class Recorder:
+        def evaluate(self, data, sentiment, latest_only=False):
+            return pd.Series([sentiment])
+    assert generate_suggestion(None, news_sentiment=0.5, analyst_sentiment=0.5, strategy=Recorder()) == 0.5
+    assert generate_suggestion(None, news_sentiment=calculate_news_sentiment(news), analyst_sentiment=0.5, strategy=Recorder()) == 0.5
@@ -0,0 +1,93 @@
+import sys
+import os
+import pickle
+import struct
+import time
+import zlib
+import pandas as pd
+import pytest
+
+# Add the parent directory to sys.path to allow importing modules from the root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import src.cache as cache_module
+from src.cache import MemoryCache, MISSING, SQLiteBackend, cached, deserialize, estimate_nbytes, serialize
+
+def test_estimate_nbytes():
+    """DataFrames are measured with deep memory usage."""
+    frame = pd.DataFrame({'a': range(1000)}, dtype='int64')
+    assert estimate_nbytes(frame) >= 8000
+    assert estimate_nbytes({'frame': frame}) > estimate_nbytes(frame)
+
+def test_memory_cache_evicts_by_bytes():
+    """The least recently used entries are evicted once the byte budget is exceeded."""
+    frame = pd.DataFrame({'a': range(1000)}, dtype='int64')
+    size = estimate_nbytes(frame)
+    cache = MemoryCache(max_bytes=int(size * 2.5))
+
+    cache.set('a', frame)
+    cache.set('b', frame)
+    cache.get('a')  # 'b' becomes least recently used
+    cache.set('c', frame)
+
+    assert cache.get('b') is MISSING
+    assert cache.get('a') is frame and cache.get('c') is frame
+    stats = cache.stats()
+    assert stats['entries'] == 2 and stats['bytes'] == 2 * size and stats['evictions'] == 1
+
+    # Values larger than the whole budget are not cached
+    cache.set('big', pd.concat([frame] * 3))
+    assert cache.get('big') is MISSING
+
+def test_memory_cache_ttl():
+    """Expired entries are treated as misses but remain available as stale copies."""
+    cache = MemoryCache(max_bytes=1024 * 1024)
+    cache.set('key', 'value', ttl=0.01)
+    assert cache.get('key') == 'value'
+    time.sleep(0.02)
+    assert cache.get('key') is MISSING
+    assert cache.get_stale('key') == 'value'
+    assert cache.get_stale('other') is MISSING
+
+def test_serialize_roundtrip():
+    """Frames survive serialization together with their expiry time."""
+    frame = pd.DataFrame({'Close': [1.5, 2.5]}, dtype='float32')
+    value, expires_at = deserialize(serialize({'frame': frame}, 1234.5))
+    assert value['frame'].equals(frame) and value['frame']['Close'].dtype == frame['Close'].dtype
+    assert expires_at == 1234.5
+    assert deserialize(serialize('x'))[1] is None
+
+    # Tuples of frames (e.g. option chains) and nested JSON data keep their types
+    chain = pd.DataFrame({'contractSymbol': pd.Categorical(['A', 'B']), 'openInterest': pd.Series([1, 2], dtype='uint16')})
+    value, _ = deserialize(serialize((chain, {'news': [{'id': 1, 'headline': 'x'}]}, None)))
+    assert isinstance(value, tuple) and value[0].equals(chain) and value[1:] == ({'news': [{'id': 1, 'headline': 'x'}]}, None)
+
+def test_serialize_rejects_arbitrary_objects():
+    """Only data is serialized: arbitrary objects are refused instead of being pickled."""
+    with pytest.raises(TypeError):
+        serialize(object())
+    with pytest.raises(TypeError):
+        serialize({1: 'non-string key'})
+
+    # A pickle planted in the backend is not unpickled
+    payload = struct.pack('>d', 0.0) + zlib.compress(pickle.dumps({'a': 1}))
+    with pytest.raises(Exception):
+        deserialize(payload)
+
+def test_cached_uses_shared_backend(tmp_path, monkeypatch):
+    """A value fetched by one replica is served to another from the shared backend."""
+    monkeypatch.setattr(cache_module, 'BACKEND', SQLiteBackend(str(tmp_path / 'cache.db')))
+    calls = []
+
+    @cached(ttl=60)
+    def fetch(ticker):
+        calls.append(ticker)
+        return pd.DataFrame({'Close': [1.0]})
+
+    first = fetch('AAPL')
+    # Simulate another replica: its local cache is empty but the backend is shared
+    monkeypatch.setattr(cache_module, 'CACHE', MemoryCache(max_bytes=1024 * 1024))
+    second = fetch('AAPL')
+
+    assert calls == ['AAPL']
+    assert second.equals(first)
@@ -0,0 +1,77 @@
+import sys
+import os
+import pandas as pd
+import numpy as np
+
+# Add the parent directory to sys.path to allow importing modules from the root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.compact import compact_price_frame, compact_option_chain, compact_advanced_data, normalize_financials
+
+def test_compact_price_frame():
+    """Prices are downcast to float32 and volume to the smallest unsigned integer type."""
+    data = pd.DataFrame({
+        'Open': [100.0, 101.0], 'High': [102.0, 103.0], 'Low': [99.0, 100.0],
+        'Close': [101.5, 102.5], 'Volume': [1_000_000, 2_500_000],
+    })
+    compact = compact_price_frame(data)
+
+    assert compact['Close'].dtype == np.float32
+    assert compact['Volume'].dtype == np.uint32
+    assert compact.memory_usage(deep=True).sum() < data.memory_usage(deep=True).sum()
+    # The input frame is left untouched
+    assert data['Close'].dtype == np.float64
+
+def test_compact_option_chain():
+    """Only used columns are kept; counts become integers and symbols categorical."""
+    options = pd.DataFrame({
+        'contractSymbol': ['AAPL250117C00100000', 'AAPL250117C00105000'],
+        'lastTradeDate': pd.to_datetime(['2025-01-02', '2025-01-02']),
+        'strike': [100.0, 105.0],
+        'lastPrice': [2.5, 1.1],
+        'change': [0.1, -0.2],
+        'volume': [10.0, np.nan],
+        'openInterest': [500, 20],
+        'impliedVolatility': [0.25, 0.3],
+        'inTheMoney': [False, False],
+        'currency': ['USD', 'USD'],
+    })
+    chain = compact_option_chain(options)
+
+    assert 'lastTradeDate' not in chain and 'currency' not in chain
+    assert chain['contractSymbol'].dtype == 'category'
+    assert chain['volume'].tolist() == [10, 0]
+    assert chain['openInterest'].dtype.kind == 'u'
+    assert chain['strike'].dtype == np.float32
+
+def test_compact_advanced_data():
+    """Raw Finnhub payloads are trimmed to the fields the UI reads."""
+    raw = {
+        'metrics': {'metric': {'peTTM': 30.1, 'epsTTM': 6.2, '52WeekHigh': 200, '52WeekLow': 150, 'beta': 1.2}, 'series': {'annual': {}}},
+        'recommendations': [{'period': '2025-01-01', 'buy': 20, 'hold': 5, 'sell': 1, 'strongBuy': 10, 'strongSell': 0, 'symbol': 'AAPL'}],
+        'filings': [{'form': '10-Q', 'filingUrl': 'u', 'filedDate': '2025-01-01', 'accessNumber': 'x'}] * 10,
+        'lobbying': None,
+        'usa_spending': {'data': [{'agencyName': 'DoD', 'amount': 1.0, 'description': 'long text'}]},
+        'financials': None,
+    }
+    data = compact_advanced_data(raw)
+
+    assert data['metrics'] == {'metric': {'peTTM': 30.1, 'epsTTM': 6.2, '52WeekHigh': 200, '52WeekLow': 150}}
+    assert 'symbol' not in data['recommendations'][0]
+    assert len(data['filings']) == 5
+    assert data['lobbying'] == {'data': []}
+    assert data['usa_spending'] == {'data': [{'agencyName': 'DoD', 'amount': 1.0}]}
+    assert data['financials'] == []
+
+def test_normalize_financials():
+    """Namespaced XBRL concepts are mapped to short names per report."""
+    financials = {'data': [{
+        'year': 2024, 'quarter': 3, 'form': '10-Q', 'filedDate': '2024-08-02', 'accessNumber': 'x',
+        'report': {
+            'ic': [{'concept': 'us-gaap_NetIncomeLoss', 'value': 100}, {'concept': 'us-gaap_CostOfRevenue', 'value': 5}],
+            'bs': [{'concept': 'us-gaap_Assets', 'value': 1000}],
+        },
+    }]}
+    assert normalize_financials(financials) == [
+        {'year': 2024, 'quarter': 3, 'form': '10-Q', 'filedDate': '2024-08-02', 'net_income': 100, 'total_assets': 1000}
+    ]
@@ -0,0 +1,120 @@
+import sys
+import os
+import json
+
+# Add the parent directory to sys.path to allow importing modules from the root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.cache import cached
+import pandas as pd
+
+import src.daemon as daemon
+from src.daemon import run_cycle, load_state, save_state, JsonlSink, evaluate_ticker
+from src.scheduler import QuotaExceeded
+
+class ListSink:
+    def __init__(self):
+        self.events = []
+
+    def emit(self, event):
+        self.events.append(event)
+
+def make_evaluate(signals):
+    """Returns an evaluate function that reads the current signal/contract per ticker from a dict."""
+    def evaluate(ticker, previous):
+        if ticker not in signals:
+            return None
+        signal, contract = signals[ticker]
+        return {'signal': signal, 'contract': contract, 'price': 100.0, 'fingerprint': f"{signal}|{contract}"}
+    return evaluate
+
+def test_run_cycle_emits_only_on_changes():
+    """Events are emitted for new tickers and signal/contract flips, not for unchanged signals."""
+    sink = ListSink()
+    signals = {'AAPL': ('Hold', None), 'NVDA': ('Call', 'NVDA1')}
+
+    state = run_cycle(['AAPL', 'NVDA'], {}, [sink], make_evaluate(signals))
+    assert [e['ticker'] for e in sink.events] == ['AAPL', 'NVDA']
+
+    sink.events.clear()
+    state = run_cycle(['AAPL', 'NVDA'], state, [sink], make_evaluate(signals))
+    assert sink.events == []
+
+    signals['AAPL'] = ('Call', 'AAPL1')
+    signals['NVDA'] = ('Call', 'NVDA2')
+    state = run_cycle(['AAPL', 'NVDA'], state, [sink], make_evaluate(signals))
+    assert [(e['ticker'], e['previous_signal'], e['signal'], e['contract']) for e in sink.events] == [
+        ('AAPL', 'Hold', 'Call', 'AAPL1'),
+        ('NVDA', 'Call', 'Call', 'NVDA2'),
+    ]
+
+def test_run_cycle_keeps_state_on_errors_and_drops_removed_tickers():
+    """A failed evaluation keeps the previous state; tickers removed from the watchlist are forgotten."""
+    state = {'AAPL': {'signal': 'Call', 'contract': 'A', 'price': 1.0, 'fingerprint': 'x'},
+             'MSFT': {'signal': 'Put', 'contract': 'M', 'price': 1.0, 'fingerprint': 'y'}}
+
+    def failing(ticker, previous):
+        raise RuntimeError("provider down")
+
+    sink = ListSink()
+    new_state = run_cycle(['AAPL'], state, [sink], failing)
+    assert new_state == {'AAPL': state['AAPL']}
+    assert sink.events == []
+
+def test_state_and_jsonl_sink_round_trip(tmp_path):
+    """State is persisted between runs and events are appended as JSON lines."""
+    state_path = str(tmp_path / 'state.json')
+    assert load_state(state_path) == {}
+    save_state(state_path, {'AAPL': {'signal': 'Hold'}})
+    assert load_state(state_path) == {'AAPL': {'signal': 'Hold'}}
+
+    events_path = tmp_path / 'events.jsonl'
+    sink = JsonlSink(str(events_path))
+    sink.emit({'ticker': 'AAPL'})
+    sink.emit({'ticker': 'MSFT'})
+    assert [json.loads(line)['ticker'] for line in events_path.read_text().splitlines()] == ['AAPL', 'MSFT']
+
+def test_stdout_sink_carries_only_events(capsys):
+    """Diagnostics from failed evaluations and quota fallbacks go to stderr, so stdout stays valid JSONL."""
+    @cached(ttl=60, fallback=lambda ticker: None)
+    def fetch_quote(ticker):
+        raise QuotaExceeded("finnhub API budget exhausted")
+
+    def evaluate(ticker, previous):
+        if ticker == 'BAD':
+            raise RuntimeError("provider timeout")
+        if ticker == 'NOQUOTA':
+            return fetch_quote(ticker)
+        return {'signal': 'Call', 'contract': 'AAPL1', 'price': 100.0, 'fingerprint': 'x'}
+
+    run_cycle(['BAD', 'NOQUOTA', 'AAPL'], {}, [JsonlSink()], evaluate)
+    out, err = capsys.readouterr()
+
+    events = [json.loads(line) for line in out.splitlines()]
+    assert [e['ticker'] for e in events] == ['AAPL']
+    assert "Error evaluating BAD" in err
+    assert "no cached data" in err
+
+def test_quota_fallback_keeps_previous_state(monkeypatch):
+    """After a restart with a cold cache, quota fallbacks must not flip the persisted signal and alert."""
+    bars = pd.DataFrame({'Close': [100.0, 101.0]}, index=pd.date_range('2024-07-11', periods=2))
+    monkeypatch.setattr(daemon, 'get_stock_data', lambda ticker: bars)
+    monkeypatch.setattr(daemon, 'get_sentiment', lambda ticker: (0.4, None))
+    monkeypatch.setattr(daemon, 'get_advanced_data', lambda ticker: {'recommendations': []})
+    monkeypatch.setattr(daemon, 'find_options_contracts', lambda *args, **kwargs: (pd.DataFrame({'contractSymbol': ['AAPL1']}), None))
+    # Call only while every source is present, as when the fallbacks used to score news as neutral
+    monkeypatch.setattr(daemon, 'generate_suggestion', lambda data, sentiment, news_sentiment, analyst_sentiment: 'Call' if news_sentiment is not None else 'Hold')
+    news = {'items': [{'headline': 'Profit surge', 'summary': ''}]}
+    monkeypatch.setattr(daemon, 'get_company_news', lambda ticker: news['items'])
+
+    sink = ListSink()
+    state = run_cycle(['AAPL'], {}, [sink], evaluate_ticker)
+    assert state['AAPL']['signal'] == 'Call'
+
+    sink.events.clear()
+    news['items'] = None  # Quota spent, nothing cached
+    assert run_cycle(['AAPL'], state, [sink], evaluate_ticker) == state
+    monkeypatch.setattr(daemon, 'get_sentiment', lambda ticker: (0.0, daemon.SENTIMENT_RATE_LIMITED))
+    news['items'] = [{'headline': 'Profit surge', 'summary': ''}]
+    assert run_cycle(['AAPL'], state, [sink], evaluate_ticker) == state
+    assert sink.events == []
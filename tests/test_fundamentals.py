@@ -0,0 +1,111 @@
+import sys
+import os
+import pytest
+
+# Add the parent directory to sys.path to allow importing modules from the root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import src.cache as cache_module
+import src.fundamentals as fundamentals
+from src.cache import MemoryCache, SQLiteBackend
+from src.fundamentals import FundamentalsStore, get_basic_metrics, get_fundamentals, latest_report_date
+from src.scheduler import QuotaExceeded
+
+class FakeClient:
+    def __init__(self):
+        self.filing_list = [{'form': '10-Q', 'filedDate': '2024-05-03 00:00:00', 'filingUrl': 'q1', 'accessNumber': 'a'}]
+        self.calls = []
+        self.quota_exhausted = False
+
+    def filings(self, symbol):
+        self.calls.append('filings')
+        return self.filing_list
+
+    def financials_reported(self, symbol, freq):
+        if self.quota_exhausted:
+            raise QuotaExceeded("finnhub API budget exhausted")
+        self.calls.append('financials_reported')
+        return {'data': [{'year': 2024, 'quarter': 2, 'form': '10-Q', 'filedDate': self.filing_list[0]['filedDate'],
+                          'report': {'ic': [{'concept': 'us-gaap_NetIncomeLoss', 'value': 10}]}}]}
+
+    def company_basic_financials(self, symbol, metric):
+        self.calls.append('company_basic_financials')
+        return {'metric': {'peTTM': 30.0, 'beta': 1.1}, 'series': {'annual': {'eps': [1] * 1000}}}
+
+@pytest.fixture
+def client(monkeypatch):
+    fake = FakeClient()
+    monkeypatch.setattr(fundamentals, 'get_finnhub_client', lambda: fake)
+    return fake
+
+def test_financials_refetched_only_on_new_report(tmp_path, client):
+    """Financials are fetched once, served from the store while filings are unchanged, and refetched on a new 10-Q/10-K."""
+    store = FundamentalsStore(SQLiteBackend(str(tmp_path / 'fundamentals.db')))
+
+    first = get_fundamentals('AAPL', store)
+    assert first['financials'][0]['net_income'] == 10
+    assert client.calls == ['filings', 'financials_reported']
+
+    client.calls.clear()
+    # A non-report filing does not trigger a refetch, but shows up in the filings list
+    client.filing_list = [{'form': '8-K', 'filedDate': '2024-06-01 00:00:00', 'filingUrl': 'k'}] + client.filing_list
+    second = get_fundamentals('AAPL', store)
+    assert client.calls == ['filings']
+    assert second['financials'] == first['financials'] and second['filings'][0]['form'] == '8-K'
+
+    client.calls.clear()
+    client.filing_list = [{'form': '10-Q', 'filedDate': '2024-08-02 00:00:00', 'filingUrl': 'q2'}] + client.filing_list
+    third = get_fundamentals('AAPL', store)
+    assert client.calls == ['filings', 'financials_reported']
+    assert third['latest_report'] == '2024-08-02 00:00:00'
+
+def test_store_persists_across_instances(tmp_path, client):
+    """A new process (or replica) sharing the backend does not refetch the heavy endpoints."""
+    path = str(tmp_path / 'fundamentals.db')
+    get_fundamentals('AAPL', FundamentalsStore(SQLiteBackend(path)))
+
+    client.calls.clear()
+    get_fundamentals('AAPL', FundamentalsStore(SQLiteBackend(path)))
+    assert client.calls == ['filings']
+
+def test_previous_report_served_when_out_of_quota(tmp_path, client):
+    """If a new report is filed but the quota is spent, the stored fundamentals are served."""
+    store = FundamentalsStore(SQLiteBackend(str(tmp_path / 'fundamentals.db')))
+    first = get_fundamentals('AAPL', store)
+
+    client.filing_list = [{'form': '10-K', 'filedDate': '2024-11-01 00:00:00', 'filingUrl': 'k'}]
+    client.quota_exhausted = True
+    assert get_fundamentals('AAPL', store) == first
+
+    with pytest.raises(QuotaExceeded):
+        get_fundamentals('MSFT', store)
+
+def test_basic_metrics_expire_daily(client, monkeypatch):
+    """Price-derived metrics are not gated on filings: they are cached for a day, then refetched."""
+    monkeypatch.setattr(cache_module, 'CACHE', MemoryCache(max_bytes=1024 * 1024))
+    monkeypatch.setattr(cache_module, 'BACKEND', None)
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, 'time', lambda: now[0])
+
+    assert get_basic_metrics('AAPL') == {'metric': {'peTTM': 30.0}}
+    assert get_basic_metrics('AAPL') == {'metric': {'peTTM': 30.0}}
+    assert client.calls == ['company_basic_financials']
+
+    now[0] += 24 * 3600 + 1
+    get_basic_metrics('AAPL')
+    assert client.calls == ['company_basic_financials'] * 2
+
+def test_corrupt_stored_payload_is_a_miss(tmp_path, client, capsys):
+    """A payload that cannot be decoded is logged and refetched instead of breaking the caller."""
+    backend = SQLiteBackend(str(tmp_path / 'fundamentals.db'))
+    backend.set('fundamentals:AAPL', b'not a payload')
+
+    fundamentals_data = get_fundamentals('AAPL', FundamentalsStore(backend))
+    assert fundamentals_data['financials'][0]['net_income'] == 10
+    assert client.calls == ['filings', 'financials_reported']
+    assert "read error" in capsys.readouterr().err
+
+def test_latest_report_date_ignores_other_forms():
+    filings = [{'form': '8-K', 'filedDate': '2024-09-01'}, {'form': '10-K', 'filedDate': '2024-02-01'}, {'form': '4', 'filedDate': '2024-10-01'}]
+    assert latest_report_date(filings) == '2024-02-01'
+    assert latest_report_date([]) is None
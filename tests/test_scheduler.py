@@ -0,0 +1,95 @@
+import sys
+import os
+import threading
+import time
+import pytest
+
+# Add the parent directory to sys.path to allow importing modules from the root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import src.cache as cache_module
+from src.cache import MemoryCache, cached
+from src.scheduler import BACKGROUND, BULK, INTERACTIVE, ProviderBudget, QuotaExceeded, QuotaScheduler, request_priority
+
+def make_scheduler(limit, period=60):
+    scheduler = QuotaScheduler({'finnhub': ProviderBudget(limit, period)})
+    scheduler.MAX_WAIT = {INTERACTIVE: 0.2, BACKGROUND: 0.2, BULK: 0.2}
+    return scheduler
+
+def test_lower_priorities_leave_reserve_for_interactive():
+    """Bulk calls stop at half the budget; interactive calls may use the rest."""
+    scheduler = make_scheduler(limit=4)
+
+    with request_priority(BULK):
+        scheduler.call('finnhub', lambda: None)
+        scheduler.call('finnhub', lambda: None)
+        with pytest.raises(QuotaExceeded):
+            scheduler.call('finnhub', lambda: None)
+
+    assert scheduler.call('finnhub', lambda: 'ok') == 'ok'
+    assert scheduler.call('finnhub', lambda: 'ok') == 'ok'
+    with pytest.raises(QuotaExceeded):
+        scheduler.call('finnhub', lambda: None)
+
+    stats = scheduler.stats()['finnhub']
+    assert stats['admitted'] == 4 and stats['rejected'] == 2 and stats['remaining'] == 0
+
+    # Providers without a budget are never throttled
+    assert scheduler.call('yfinance', lambda: 'ok') == 'ok'
+
+def test_bulk_calls_give_up_instead_of_waiting_out_the_window():
+    """Bulk work stops early (resumably) rather than blocking for a full provider window."""
+    scheduler = QuotaScheduler({'finnhub': ProviderBudget(4, 60)})
+    assert scheduler.MAX_WAIT[BULK] < 60
+
+    with request_priority(BULK):
+        scheduler.call('finnhub', lambda: None)
+        scheduler.call('finnhub', lambda: None)
+        started = time.monotonic()
+        with pytest.raises(QuotaExceeded):
+            scheduler.call('finnhub', lambda: None)
+    assert time.monotonic() - started < 1
+
+def test_waiting_calls_are_admitted_by_priority():
+    """When budget frees up, the highest-priority waiter goes first."""
+    scheduler = make_scheduler(limit=1, period=0.1)
+    scheduler.MAX_WAIT = {INTERACTIVE: 2.0, BACKGROUND: 2.0, BULK: 2.0}
+    scheduler.RESERVE = {INTERACTIVE: 0.0, BACKGROUND: 0.0, BULK: 0.0}
+    scheduler.call('finnhub', lambda: None)
+
+    order = []
+    threads = [
+        threading.Thread(target=scheduler.call, args=('finnhub', lambda p=p: order.append(p), p))
+        for p in (BULK, BACKGROUND, INTERACTIVE)
+    ]
+    for t in threads:
+        t.start()
+        time.sleep(0.01)
+    for t in threads:
+        t.join(5)
+
+    assert order == [INTERACTIVE, BACKGROUND, BULK]
+
+def test_exhaust_blocks_until_window_expires():
+    """A provider-reported rate limit spends the remaining budget."""
+    scheduler = make_scheduler(limit=10)
+    scheduler.exhaust('finnhub')
+    with pytest.raises(QuotaExceeded):
+        scheduler.call('finnhub', lambda: None)
+
+def test_cached_serves_stale_data_when_quota_exhausted(monkeypatch):
+    """An expired value is returned instead of failing; without one the fallback is used."""
+    monkeypatch.setattr(cache_module, 'CACHE', MemoryCache(max_bytes=1024 * 1024))
+    monkeypatch.setattr(cache_module, 'BACKEND', None)
+    responses = ['fresh']
+
+    @cached(ttl=0.01, fallback=lambda ticker: 'fallback')
+    def fetch(ticker):
+        if not responses:
+            raise QuotaExceeded("finnhub API budget exhausted")
+        return responses.pop()
+
+    assert fetch('AAPL') == 'fresh'
+    time.sleep(0.02)
+    assert fetch('AAPL') == 'fresh'
+    assert fetch('MSFT') == 'fallback'
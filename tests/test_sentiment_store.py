@@ -0,0 +1,112 @@
+import sys
+import os
+from datetime import date, datetime, timedelta
+import numpy as np
+import pandas as pd
+
+# Add the parent directory to sys.path to allow importing modules from the root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import src.analysis as analysis
+import src.sentiment_store as sentiment_store
+from src.sentiment_store import SentimentStore
+
+def article(article_id, day, headline, hour=10):
+    """An article published at the given US/Eastern hour of day."""
+    published = pd.Timestamp(datetime.combine(day, datetime.min.time())).tz_localize('America/New_York') + pd.Timedelta(hours=hour)
+    return {'id': article_id, 'datetime': int(published.timestamp()), 'headline': headline, 'summary': ''}
+
+def test_daily_series_deduplicates_and_aligns(tmp_path):
+    """Articles are stored once and averaged over a two-day window; analyst periods carry forward."""
+    store = SentimentStore(str(tmp_path / 'sentiment.db'))
+    d0 = date(2024, 3, 5)  # A Tuesday
+    store.add_news('AAPL', [article(1, d0, 'Profit surge'), article(2, d0 + timedelta(days=1), 'Shares drop')])
+    store.add_news('AAPL', [article(1, d0, 'Profit surge')])  # Duplicate is ignored
+    store._mark_fetched('AAPL', [d0 + timedelta(days=i) for i in range(3)])
+    store.add_recommendations('AAPL', [{'period': '2024-03-01', 'strongBuy': 1, 'buy': 0, 'hold': 0, 'sell': 0, 'strongSell': 0}])
+
+    series = store.daily_series('AAPL', d0, d0 + timedelta(days=3))
+
+    assert series['news_sentiment'].iloc[:3].tolist() == [1.0, 0.0, -1.0]
+    # Day never fetched: unknown rather than neutral
+    assert np.isnan(series['news_sentiment'].iloc[3])
+    assert series['analyst_sentiment'].tolist() == [1.0] * 4
+
+def test_after_close_news_counts_towards_next_session(tmp_path):
+    """News published after the close (or on a weekend) only shows up on the next trading day's bar."""
+    store = SentimentStore(str(tmp_path / 'sentiment.db'))
+    thursday = date(2024, 3, 7)
+    store.add_news('AAPL', [article(1, thursday, 'Profit surge'), article(2, thursday, 'Shares plunge', hour=17),
+                            article(3, date(2024, 3, 9), 'Shares plunge')])  # Saturday
+    store._mark_fetched('AAPL', [thursday + timedelta(days=i) for i in range(5)])
+
+    series = store.daily_series('AAPL', thursday, thursday + timedelta(days=4), window_days=1)
+
+    # Thursday's close only sees Thursday's in-session article; Friday gets the after-close one
+    assert series['news_sentiment'].tolist()[:2] == [1.0, -1.0]
+    # Saturday's article lands on Monday
+    assert series['news_sentiment'].tolist()[2:] == [0.0, 0.0, -1.0]
+
+def test_backfill_skips_fetched_days(tmp_path, monkeypatch):
+    """Backfill requests one batch per chunk and does not refetch days already covered."""
+    requests_seen = []
+
+    class FakeClient:
+        def company_news(self, ticker, _from, to):
+            requests_seen.append((_from, to))
+            return [article(len(requests_seen), date.fromisoformat(_from), 'Growth')]
+
+        def recommendation_trends(self, ticker):
+            return []
+
+    monkeypatch.setattr(sentiment_store, 'get_finnhub_client', lambda: FakeClient())
+    store = SentimentStore(str(tmp_path / 'sentiment.db'))
+    end = date.today() - timedelta(days=1)
+    start = end - timedelta(days=13)
+
+    assert store.backfill('AAPL', start, end, chunk_days=7) == 2
+    assert store.backfill('AAPL', start, end, chunk_days=7) == 0
+    assert requests_seen[0] == (start.isoformat(), (start + timedelta(days=6)).isoformat())
+
+def test_backfill_survives_provider_errors(tmp_path, monkeypatch, capsys):
+    """A failing chunk is logged and retried next time; other chunks and a failing trends call don't abort the backfill."""
+    failing = {'news': True}
+
+    class FailingClient:
+        def company_news(self, ticker, _from, to):
+            if failing['news'] and _from == start.isoformat():
+                raise ConnectionError("connection reset")
+            if failing['news']:
+                return {'error': 'bad payload'}
+            return [article(1, date.fromisoformat(_from), 'Growth')]
+
+        def recommendation_trends(self, ticker):
+            raise ConnectionError("connection reset")
+
+    monkeypatch.setattr(sentiment_store, 'get_finnhub_client', lambda: FailingClient())
+    store = SentimentStore(str(tmp_path / 'sentiment.db'))
+    end = date.today() - timedelta(days=1)
+    start = end - timedelta(days=13)
+
+    assert store.backfill('AAPL', start, end, chunk_days=7) == 2
+    assert store._fetched_days('AAPL', start, end) == set()
+    assert capsys.readouterr().err.count("Finnhub API error") == 3
+
+    failing['news'] = False
+    assert store.backfill('AAPL', start, end, chunk_days=7) == 2
+    assert len(store._fetched_days('AAPL', start, end)) == 14
+
+def test_run_backtest_gates_on_sentiment(monkeypatch):
+    """Bearish sentiment suppresses the long entries a purely technical backtest takes."""
+    index = pd.date_range('2023-01-02', periods=300, freq='B')
+    close = np.linspace(100, 200, 300) + np.sin(np.arange(300)) * 2
+    prices = pd.DataFrame({'Open': close, 'High': close, 'Low': close, 'Close': close, 'Volume': 1000}, index=index)
+    monkeypatch.setattr(analysis, 'get_price_history', lambda ticker, period: prices)
+
+    trades, _ = analysis.run_backtest('TEST', '2y')
+    assert (trades['Type'] == 'Buy').any()
+
+    bearish = pd.DataFrame({'news_sentiment': -1.0, 'analyst_sentiment': np.nan}, index=pd.date_range(index[0], index[-1]))
+    trades, equity = analysis.run_backtest('TEST', '2y', sentiment=bearish)
+    assert trades.empty
+    assert equity['Equity'].iloc[-1] == 10000
@@ -0,0 +1,53 @@
+import sys
+import os
+import threading
+import time
+import pytest
+
+# Add the parent directory to sys.path to allow importing modules from the root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.singleflight import SingleFlight
+
+def test_concurrent_calls_are_coalesced():
+    """Concurrent calls with the same key run the function once and share its result."""
+    flights = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    runs = []
+
+    def fetch():
+        runs.append(1)
+        started.set()
+        release.wait(5)
+        return {'ticker': 'NVDA'}
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flights.do('NVDA', fetch)))
+    leader.start()
+    started.wait(5)
+
+    followers = [threading.Thread(target=lambda: results.append(flights.do('NVDA', fetch))) for _ in range(4)]
+    for t in followers:
+        t.start()
+    while flights.stats()['coalesced'] < 4:
+        time.sleep(0.001)
+    release.set()
+    for t in [leader] + followers:
+        t.join(5)
+
+    assert len(runs) == 1
+    assert len(results) == 5 and all(r is results[0] for r in results)
+    assert flights.stats() == {'calls': 1, 'coalesced': 4, 'in_flight': 0}
+
+def test_errors_are_shared_and_not_cached():
+    """Waiters receive the leader's exception, and the next call runs again."""
+    flights = SingleFlight()
+
+    def fail():
+        raise ValueError("provider down")
+
+    with pytest.raises(ValueError):
+        flights.do('SPY', fail)
+    assert flights.do('SPY', lambda: 42) == 42
+    assert flights.stats()['calls'] == 2
@@ -0,0 +1,81 @@
+import sys
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+# Add the parent directory to sys.path to allow importing modules from the root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import src.strategy as strategy_module
+from src.strategy import DEFAULT, DEFAULT_STRATEGY, compile_strategy
+from src.analysis import generate_suggestion
+
+def make_prices(n=400, seed=13):
+    close = 100 + np.cumsum(np.random.default_rng(seed).normal(0, 1.5, n))
+    return pd.DataFrame({'Close': close}, index=pd.date_range('2022-01-03', periods=n, freq='B'))
+
+def test_default_strategy_matches_original_rules():
+    """The compiled default strategy reproduces the hand-written SMA/RSI rules on every bar."""
+    data = DEFAULT.add_indicators(make_prices())
+    signals = DEFAULT.evaluate(data)
+
+    bullish = (data['SMA_50'] > data['SMA_200']) & (data['RSI_14'] < 70) & (data['Close'] > data['SMA_50'])
+    bearish = (data['SMA_50'] < data['SMA_200']) & (data['RSI_14'] > 30) & (data['Close'] < data['SMA_50'])
+    expected = np.where(bullish, 'Call', np.where(bearish, 'Put', 'Hold'))
+
+    assert (signals.to_numpy() == expected).all()
+    assert set(signals.unique()) == {'Call', 'Put', 'Hold'}
+
+def test_latest_only_matches_full_history():
+    """Evaluating just the latest bar gives the same signal as the last bar of a full evaluation."""
+    data = make_prices()
+    for end in (250, 300, 400):
+        window = data.iloc[:end]
+        assert DEFAULT.evaluate(window, latest_only=True).iloc[-1] == DEFAULT.evaluate(window).iloc[-1]
+
+def test_sentiment_gate():
+    """Signals need confirming sentiment when it is available, and are ungated when it is not."""
+    data = DEFAULT.add_indicators(make_prices())
+    signal = DEFAULT.evaluate(data).iloc[-1]
+    assert signal in ('Call', 'Put')
+    confirming = 0.5 if signal == 'Call' else -0.5
+
+    assert generate_suggestion(data) == signal
+    assert generate_suggestion(data, sentiment=confirming) == signal
+    assert generate_suggestion(data, sentiment=-confirming) == 'Hold'
+    # Per-bar sentiment with gaps (NaN) falls back to the technical signal
+    assert DEFAULT.evaluate(data, np.full(len(data), np.nan)).iloc[-1] == signal
+
+def test_shared_indicators_are_computed_once(monkeypatch):
+    """Indicators with the same parameters are computed once, and existing columns are reused."""
+    calls = []
+    original = strategy_module.INDICATORS['sma']
+    monkeypatch.setitem(strategy_module.INDICATORS, 'sma', lambda data, length: calls.append(length) or original(data, length))
+
+    definition = {
+        'indicators': {'FAST': {'kind': 'sma', 'length': 10}, 'FAST_ALIAS': {'kind': 'sma', 'length': 10}, 'SLOW': {'kind': 'sma', 'length': 30}},
+        'signals': {'Call': {'all': [['FAST', '>', 'SLOW']]}, 'Put': {'all': [['FAST_ALIAS', '<', 'SLOW']]}},
+    }
+    compiled = compile_strategy(definition)
+    data = compiled.add_indicators(make_prices())
+    assert sorted(calls) == [10, 30]
+
+    calls.clear()
+    compiled.evaluate(data)
+    assert calls == []
+
+def test_invalid_definitions_are_rejected():
+    with pytest.raises(ValueError):
+        compile_strategy({'indicators': {'X': {'kind': 'macd'}}, 'signals': {}})
+    with pytest.raises(ValueError):
+        compile_strategy({'signals': {'Call': {'all': [['Close', '!=', 1]]}}})
+    with pytest.raises(ValueError):
+        compile_strategy({'signals': {'Call': {'conditions': []}}})
+    # Operands must be defined indicators, price columns or numbers, checked before any data is seen
+    with pytest.raises(ValueError, match="SMA_20"):
+        compile_strategy({'indicators': {'SMA_50': {'kind': 'sma', 'length': 50}},
+                          'signals': {'Call': {'all': [['Close', '>', 'SMA_20']]}}})
+    with pytest.raises(ValueError):
+        compile_strategy({'signals': {'Call': {'all': [['Close', '>', [1, 2]]]}}})
+    assert compile_strategy(DEFAULT_STRATEGY).name == 'sma_trend_rsi'
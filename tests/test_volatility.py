@@ -0,0 +1,59 @@
+import sys
+import os
+import math
+import numpy as np
+import pandas as pd
+
+# Add the parent directory to sys.path to allow importing modules from the root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.volatility import norm_cdf, bs_price, bs_delta, implied_volatility, fit_iv_smile
+from src.analysis import calculate_delta
+
+def test_norm_cdf_matches_erf():
+    """The vectorized CDF approximation agrees with math.erf."""
+    x = np.linspace(-6, 6, 101)
+    expected = np.array([0.5 * (1 + math.erf(v / math.sqrt(2))) for v in x])
+    assert np.max(np.abs(norm_cdf(x) - expected)) < 1e-7
+
+def test_implied_volatility_round_trip():
+    """Prices generated at known volatilities are inverted back for a whole chain at once."""
+    S, T, r = 100.0, 0.25, 0.045
+    strikes = np.array([60, 80, 95, 100, 105, 120, 150, 100, 90])
+    is_call = np.array([True, True, True, True, True, True, True, False, False])
+    sigmas = np.array([0.9, 0.45, 0.3, 0.25, 0.22, 0.35, 1.5, 0.25, 0.28])
+
+    prices = bs_price(S, strikes, T, r, sigmas, is_call)
+    iv = implied_volatility(prices, S, strikes, T, r, is_call)
+    assert np.allclose(iv, sigmas, atol=1e-4)
+
+def test_implied_volatility_rejects_arbitrage_prices():
+    """Prices below intrinsic value or above the underlying have no implied volatility."""
+    iv = implied_volatility(np.array([5.0, 150.0, 0.0]), 100.0, np.array([90.0, 100.0, 100.0]), 0.25, 0.045, True)
+    assert np.isnan(iv).all()
+
+def test_bs_delta_matches_scalar_delta():
+    """The vectorized delta agrees with calculate_delta and returns 0 for invalid volatility."""
+    strikes = np.array([90.0, 100.0, 110.0])
+    sigmas = np.array([0.2, 0.0, 0.3])
+    deltas = bs_delta(100.0, strikes, 0.5, 0.045, sigmas, False)
+    expected = [calculate_delta(100.0, k, 0.5, 0.045, s, "Put") for k, s in zip(strikes, sigmas)]
+    assert np.allclose(deltas, expected)
+
+def test_fit_iv_smile_fills_unquoted_strikes():
+    """Strikes with stale or missing quotes get volatility from the fitted smile."""
+    S, T, r, sigma = 100.0, 0.1, 0.045, 0.3
+    strikes = np.array([90.0, 95.0, 100.0, 105.0, 110.0])
+
+    def chain(is_call):
+        price = bs_price(S, strikes, T, r, sigma, is_call)
+        return pd.DataFrame({'strike': strikes, 'bid': price * 0.99, 'ask': price * 1.01, 'lastPrice': price})
+
+    calls, puts = chain(True), chain(False)
+    # No quotes and a nonsensical last price for the 105 call and 95 put
+    calls.loc[3, ['bid', 'ask', 'lastPrice']] = [0.0, 0.0, 0.0]
+    puts.loc[1, ['bid', 'ask', 'lastPrice']] = [0.0, 0.0, 0.0]
+
+    surface = fit_iv_smile(calls, puts, S, T, r)
+    assert list(surface.index) == list(strikes)
+    assert np.allclose(surface['iv'], sigma, atol=1e-3)
@@ -0,0 +1,63 @@
+import sys
+import os
+
+# Add the parent directory to sys.path to allow importing modules from the root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.cache import SQLiteBackend
+from src.watchlist import add_to_watchlist, load_watchlist
+
+def test_watchlist_file(tmp_path):
+    path = tmp_path / "watchlist.txt"
+    path.write_text("AAPL\nmsft \n\n")
+
+    assert load_watchlist(path) == ['AAPL', 'MSFT']
+    add_to_watchlist("nvda", path)
+    add_to_watchlist("AAPL", path)
+    assert load_watchlist(path) == ['AAPL', 'MSFT', 'NVDA']
+
+def test_watchlist_shared_between_replicas(tmp_path):
+    """With a shared backend, a ticker added on one replica is visible on another; the file only seeds it."""
+    path = tmp_path / "watchlist.txt"
+    path.write_text("AAPL\n")
+    backend = SQLiteBackend(str(tmp_path / "cache.db"))
+    other_replica = SQLiteBackend(str(tmp_path / "cache.db"))
+
+    assert load_watchlist(path, backend) == ['AAPL']
+    add_to_watchlist("MSFT", path, backend)
+
+    assert load_watchlist(tmp_path / "missing.txt", other_replica) == ['AAPL', 'MSFT']
+    assert path.read_text() == "AAPL\n"
+
+def test_watchlist_survives_backend_outage(tmp_path, capsys):
+    """Backend errors are logged and the file is served instead, like shared cache misses."""
+    path = tmp_path / "watchlist.txt"
+    path.write_text("AAPL\n")
+
+    class DownBackend:
+        def get(self, key):
+            raise ConnectionError("redis unavailable")
+
+        def set(self, key, payload, ttl=None):
+            raise ConnectionError("redis unavailable")
+
+    class ReadOnlyDownBackend(DownBackend):
+        def __init__(self):
+            self.writes = []
+
+        def set(self, key, payload, ttl=None):
+            self.writes.append(key)
+
+    assert load_watchlist(path, DownBackend()) == ['AAPL']
+    assert "read error" in capsys.readouterr().err
+
+    # A failed read must not write the file seed back over the shared list
+    backend = ReadOnlyDownBackend()
+    add_to_watchlist("MSFT", path, backend)
+    assert backend.writes == []
+    assert "not saved" in capsys.readouterr().err
+
+    backend = SQLiteBackend(str(tmp_path / "cache.db"))
+    backend.set = DownBackend().set
+    assert add_to_watchlist("MSFT", path, backend) == ['AAPL', 'MSFT']
+    assert "write error" in capsys.readouterr().err